@@ -1,5 +1,5 @@
 def validate_credentials(school, username, password):
-    emp = school.employees[school.employees['username'] == username]
-    if not emp.empty and emp['password'].values[0] == password:
-        return emp['role'].values[0]
+    emp = school.get_row('employees', username, 'username')
+    if emp is not None and emp['password'] == password:
+        return emp['role']
     return None
\ No newline at end of file
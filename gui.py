@@ -7,7 +7,11 @@ from tkinter import filedialog
 from tkinter.scrolledtext import ScrolledText
 from pathlib import Path
 import pandas as pd  
-from person import Admin, Teacher  
+import threading
+import base64
+from person import Admin, Teacher
+from plots import plot_names  
+from validation import ValidationError
 
 # ------------------ Paths and Asset Helper ------------------
 OUTPUT_PATH = Path(__file__).parent
@@ -77,7 +81,12 @@ class FormWindow(tk.Toplevel):
         
         # Submission function
         def on_submit():
-            result = submit_callback(self.get_values())
+            try:
+                result = submit_callback(self.get_values())
+            except ValidationError as e:
+                # Values that do not match the table's schema are reported instead of saved
+                messagebox.showerror("Error", str(e), parent=self)
+                return
             if result:
                 self.destroy()
         
@@ -202,6 +211,124 @@ class LoginFrame(tk.Frame):
         password = self.password_entry.get()
         self.login_callback(username, password)
 
+def png_image(data):
+    """Tk image from PNG bytes rendered in memory."""
+    return tk.PhotoImage(data=base64.b64encode(data))
+
+# ------------------ Analysis Report Window ------------------
+class AnalysisReportWindow(tk.Toplevel):
+    """
+    Analysis report of a class. The statistics are shown straight away; each plot is rendered in memory on a
+    background thread the first time its tab is opened, with a placeholder until it is ready. Plots are only
+    written to the reports folder with the Export button.
+    """
+    def __init__(self, parent, school, report):
+        super().__init__(parent)
+        self.school = school
+        self.report = report
+        class_id = report['class_id']
+        self.title(f"Analysis Report for {report.get('class_name', f'Class {class_id}')}")
+        self.geometry("800x600")
+        
+        tk.Button(self, text="Export Plots", font=("Arial", 11), command=self.export_plots).pack(
+            side="bottom", anchor="e", padx=10, pady=(0, 10))
+        
+        # Create a notebook for tabs
+        self.notebook = ttk.Notebook(self)
+        self.notebook.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        # Summary tab
+        summary_tab = tk.Frame(self.notebook)
+        self.notebook.add(summary_tab, text="Summary")
+        
+        # Display summary information
+        summary_text = (
+            f"Class: {report.get('class_name', f'Class {class_id}')}\n\n"
+            f"Attendance Statistics:\n"
+            f"  - Total Records: {report['attendance']['count']}\n"
+            f"  - Present Rate: {report['attendance']['present_rate']:.2f}%\n"
+            f"  - Standard Deviation: {report['attendance']['std_dev']:.2f}%\n\n"
+            f"Marks Statistics:\n"
+            f"  - Total Students: {report['marks']['count']}\n"
+            f"  - Average Mark: {report['marks']['average']:.2f}\n"
+            f"  - Standard Deviation: {report['marks']['std_dev']:.2f}"
+        )
+        
+        summary_label = tk.Label(summary_tab, text=summary_text, justify="left", 
+                                font=("Arial", 12), padx=20, pady=20)
+        summary_label.pack(anchor="nw")
+        
+        # Plot name -> frame it is shown in; the summary plot goes under the summary text
+        self.plot_frames = {}
+        self.requested = set()
+        names = plot_names(report)
+        if 'summary' in names:
+            self.plot_frames['summary'] = summary_tab
+        if 'attendance' in names:
+            self.plot_frames['attendance'] = tk.Frame(self.notebook)
+            self.notebook.add(self.plot_frames['attendance'], text="Attendance")
+        if 'marks' in names:
+            self.plot_frames['marks'] = tk.Frame(self.notebook)
+            self.notebook.add(self.plot_frames['marks'], text="Marks")
+        
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.render_plot('summary')
+        
+        # Ensure the window comes to the front
+        self.lift()
+        self.attributes('-topmost', True)
+        self.after_idle(self.attributes, '-topmost', False)
+        
+        # Focus on the window
+        self.focus_force()
+    
+    def on_tab_changed(self, event):
+        selected = self.nametowidget(self.notebook.select())
+        for name, frame in self.plot_frames.items():
+            if frame is selected:
+                self.render_plot(name)
+    
+    def render_plot(self, name):
+        if name not in self.plot_frames or name in self.requested:
+            return
+        self.requested.add(name)
+        placeholder = tk.Label(self.plot_frames[name], text="Rendering plot...", font=("Arial", 12), fg="#666666")
+        placeholder.pack(pady=10)
+        
+        def run():
+            try:
+                data, error = self.school.analysis_image(self.report['class_id'], name), None
+            except Exception as e:
+                data, error = None, e
+            try:
+                # Widgets may only be touched from the main thread
+                self.after(0, lambda: self.show_plot(placeholder, data, error))
+            except (RuntimeError, tk.TclError):
+                pass  # The window was closed while the plot was rendering
+        
+        threading.Thread(target=run, daemon=True).start()
+    
+    def show_plot(self, placeholder, data, error):
+        if not placeholder.winfo_exists():
+            return
+        if error is not None or data is None:
+            placeholder.config(text=f"Failed to render plot: {error}" if error else "No data to plot.")
+            return
+        image = png_image(data)
+        placeholder.config(image=image, text="")
+        placeholder.image = image  # Keep a reference to prevent garbage collection
+    
+    def export_plots(self):
+        try:
+            paths = self.school.export_analysis_plots(self.report['class_id'])
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export plots: {e}", parent=self)
+            return
+        if paths:
+            messagebox.showinfo("Export Plots", "Saved:\n" + "\n".join(paths.values()), parent=self)
+        else:
+            messagebox.showinfo("Export Plots", "This class has no data to plot.", parent=self)
+
 # ------------------ Admin Dashboard ------------------
 
 
@@ -210,6 +337,8 @@ class AdminDashboard(tk.Frame):
         super().__init__(parent)
         self.admin = admin
         self.parent = parent
+        # The dashboard's screens use every table; read them while the dashboard is drawn
+        self.admin.school.preload()
         self.configure(width=1000, height=700)
         self.pack_propagate(0)
         
@@ -281,6 +410,11 @@ class AdminDashboard(tk.Frame):
         )
         self.button_2.place(x=617, y=444, width=243, height=118)
         
+        # School-wide statistics, between the two rows of main buttons
+        self.overview_button = tk.Button(self, text="School Overview", font=("Inter", 16), bg="#8B0000",
+                                         fg="#FFFFFF", command=self.open_school_overview)
+        self.overview_button.place(x=392, y=353, width=216, height=50)
+        
         # Container for management frames
         self.management_container = tk.Frame(self)
         self.current_management_frame = None
@@ -316,6 +450,9 @@ class AdminDashboard(tk.Frame):
     
     def open_class_management(self):
         self.show_management_frame(ClassManagementFrame, self.admin)
+    
+    def open_school_overview(self):
+        self.show_management_frame(SchoolOverviewFrame, self.admin)
 
 # New frame classes for each management type
 class EmployeeManagementFrame(tk.Frame):
@@ -352,7 +489,7 @@ class EmployeeManagementFrame(tk.Frame):
             widget.destroy()
     
         try:
-            df = pd.read_csv("csv/employees.csv")
+            df = self.admin.school.employees
         
         # Create a header with refresh time
             header_frame = tk.Frame(self.data_panel, bg="#FFFFFF")
@@ -373,7 +510,7 @@ class EmployeeManagementFrame(tk.Frame):
             st.config(state=tk.DISABLED)
         
         except Exception as e:
-            error_label = tk.Label(self.data_panel, text=f"Failed to read employees.csv:\n{e}", 
+            error_label = tk.Label(self.data_panel, text=f"Failed to load employee data:\n{e}", 
                               bg="#FFFFFF", fg="#FF0000", pady=10)
             error_label.pack(fill="both", expand=True)
     
@@ -420,7 +557,7 @@ class EmployeeManagementFrame(tk.Frame):
                 messagebox.showerror("Error", "Invalid Employee ID.")
                 return False
             
-            if emp_id not in self.admin.school.employees['employee_id'].values:
+            if self.admin.school.lookup('employees', emp_id) is None:
                 messagebox.showerror("Error", "Employee ID not found.")
                 return False
             
@@ -494,11 +631,24 @@ class StudentManagementFrame(tk.Frame):
             return
             
         try:
+            # Students already on file (same name, age and class) can be updated instead of added again
+            update = messagebox.askyesno(
+                "Import Students",
+                "Update students that are already on file (matched by name, age and class) instead of adding them again?")
+            key = ['name', 'age', 'class'] if update else None
             # Use the import_students_csv method from school class
-            new_records = self.admin.school.import_students_csv(file_path)
+            summary = self.admin.school.import_students_csv(file_path, key=key)
             
-            # Show success message with count of imported records
-            messagebox.showinfo("Import Successful", f"Successfully imported {len(new_records)} student records.")
+            # Show success message with count of imported records, and the first few rejected rows
+            message = f"Successfully imported {summary['imported']} student records."
+            if update:
+                message += f"\n{summary['updated']} updated, {summary['unchanged']} unchanged."
+            if summary['rejected']:
+                message += f"\n\n{len(summary['rejected'])} rows were rejected:\n" + "\n".join(
+                    f"Row {reject['row']}: {reject['reason']}" for reject in summary['rejected'][:10])
+                if len(summary['rejected']) > 10:
+                    message += "\n..."
+            messagebox.showinfo("Import Successful", message)
             
             # Refresh the display
             self.display_student_data()
@@ -512,7 +662,7 @@ class StudentManagementFrame(tk.Frame):
             widget.destroy()
     
         try:
-            df = pd.read_csv("csv/students.csv")
+            df = self.admin.school.students
         
         # Create a header with refresh time
             header_frame = tk.Frame(self.data_panel, bg="#FFFFFF")
@@ -533,7 +683,7 @@ class StudentManagementFrame(tk.Frame):
             st.config(state=tk.DISABLED)
         
         except Exception as e:
-            error_label = tk.Label(self.data_panel, text=f"Failed to read students.csv:\n{e}", 
+            error_label = tk.Label(self.data_panel, text=f"Failed to load student data:\n{e}", 
                               bg="#FFFFFF", fg="#FF0000", pady=10)
             error_label.pack(fill="both", expand=True)
     
@@ -579,7 +729,7 @@ class StudentManagementFrame(tk.Frame):
                 messagebox.showerror("Error", "Invalid Student ID.")
                 return False
             
-            if std_id not in self.admin.school.students['student_id'].values:
+            if self.admin.school.lookup('students', std_id) is None:
                 messagebox.showerror("Error", "Student ID not found.")
                 return False
             
@@ -632,10 +782,13 @@ class ClassManagementFrame(tk.Frame):
         tk.Button(button_panel, text="Academic Report", font=btn_font, 
                  command=self.generate_class_report).grid(row=0, column=2, padx=5, pady=5)
 
+        tk.Button(button_panel, text="All Reports", font=btn_font, 
+                 command=self.generate_all_reports).grid(row=0, column=3, padx=5, pady=5)
+
         # Add refresh button
         refresh_btn = tk.Button(button_panel, text="🔄", font=btn_font, bg="#4CAF50", fg="white", 
                               command=self.display_class_schedules)
-        refresh_btn.grid(row=0, column=3, padx=5, pady=5)
+        refresh_btn.grid(row=0, column=4, padx=5, pady=5)
         
         # Data view panel
         self.data_panel = tk.Frame(self, bg="#FFFFFF")
@@ -650,7 +803,7 @@ class ClassManagementFrame(tk.Frame):
             widget.destroy()
 
         try:
-            df = pd.read_csv("csv/schedules.csv")
+            df = self.admin.school.schedules
         
         # Create a header with refresh time
             header_frame = tk.Frame(self.data_panel, bg="#FFFFFF")
@@ -671,7 +824,7 @@ class ClassManagementFrame(tk.Frame):
             st.config(state=tk.DISABLED)
         
         except Exception as e:
-            error_label = tk.Label(self.data_panel, text=f"Failed to read schedules.csv:\n{e}", 
+            error_label = tk.Label(self.data_panel, text=f"Failed to load class schedules:\n{e}", 
                               bg="#FFFFFF", fg="#FF0000", pady=10)
             error_label.pack(fill="both", expand=True)
     
@@ -738,6 +891,46 @@ class ClassManagementFrame(tk.Frame):
         
         FormWindow(self, "Generate Attendance Report", fields, submit)
 
+    def generate_all_reports(self):
+        """Generate the academic report of every class in the background, showing progress in a small window."""
+        progress_window = tk.Toplevel(self)
+        progress_window.title("Generating Reports")
+        progress_window.geometry("400x120")
+        status = tk.Label(progress_window, text="Computing statistics...", font=("Arial", 12))
+        status.pack(pady=10)
+        bar = ttk.Progressbar(progress_window, length=350, mode="determinate")
+        bar.pack(pady=10)
+
+        # Tk widgets may only be touched from the main thread, so the worker hands updates over with after()
+        def on_progress(done, total, class_id):
+            def update():
+                bar["maximum"] = total
+                bar["value"] = done
+                status.config(text=f"Rendered class {class_id} ({done} of {total})")
+            self.after(0, update)
+
+        def on_finished(reports):
+            progress_window.destroy()
+            failed = [class_id for class_id, report in reports.items() if 'error' in report]
+            message = f"Generated reports for {len(reports) - len(failed)} classes in the reports folder."
+            if failed:
+                message += f"\nFailed: {', '.join(str(class_id) for class_id in failed)}"
+            messagebox.showinfo("Reports", message)
+
+        def on_error(error):
+            progress_window.destroy()
+            messagebox.showerror("Error", f"Failed to generate reports: {error}")
+
+        def run():
+            try:
+                reports = self.admin.generate_all_reports(progress=on_progress)
+            except Exception as e:
+                self.after(0, lambda error=e: on_error(error))
+                return
+            self.after(0, lambda: on_finished(reports))
+
+        threading.Thread(target=run, daemon=True).start()
+
     def generate_class_report(self):
         fields = [
             ("Class ID", "")
@@ -748,76 +941,14 @@ class ClassManagementFrame(tk.Frame):
                 class_id = int(values["Class ID"])
                 
                 # Generate the report
-                report = self.admin.analysis_report(class_id)
+                report = self.admin.analysis_report(class_id, plots=False)
                 
                 if 'error' in report:
                     messagebox.showerror("Error", f"Failed to generate report: {report['error']}")
                     return False
                 
-                # Create a new window to display the report
-                report_window = tk.Toplevel()
-                report_window.title(f"Analysis Report for {report.get('class_name', f'Class {class_id}')}")
-                report_window.geometry("800x600")
-                
-                # Create a notebook for tabs
-                notebook = ttk.Notebook(report_window)
-                notebook.pack(fill="both", expand=True, padx=10, pady=10)
-                
-                # Summary tab
-                summary_tab = tk.Frame(notebook)
-                notebook.add(summary_tab, text="Summary")
-                
-                # Display summary information
-                summary_text = (
-                    f"Class: {report.get('class_name', f'Class {class_id}')}\n\n"
-                    f"Attendance Statistics:\n"
-                    f"  - Total Records: {report['attendance']['count']}\n"
-                    f"  - Present Rate: {report['attendance']['present_rate']:.2f}%\n"
-                    f"  - Standard Deviation: {report['attendance']['std_dev']:.2f}%\n\n"
-                    f"Marks Statistics:\n"
-                    f"  - Total Students: {report['marks']['count']}\n"
-                    f"  - Average Mark: {report['marks']['average']:.2f}\n"
-                    f"  - Standard Deviation: {report['marks']['std_dev']:.2f}"
-                )
-                
-                summary_label = tk.Label(summary_tab, text=summary_text, justify="left", 
-                                        font=("Arial", 12), padx=20, pady=20)
-                summary_label.pack(anchor="nw")
-                
-                # Display summary plot if available
-                if 'summary' in report['plots']:
-                    summary_img = tk.PhotoImage(file=report['plots']['summary'])
-                    summary_img_label = tk.Label(summary_tab, image=summary_img)
-                    summary_img_label.image = summary_img  # Keep a reference to prevent garbage collection
-                    summary_img_label.pack(pady=10)
-                
-                # Attendance tab
-                if 'attendance' in report['plots']:
-                    attendance_tab = tk.Frame(notebook)
-                    notebook.add(attendance_tab, text="Attendance")
-                    
-                    attendance_img = tk.PhotoImage(file=report['plots']['attendance'])
-                    attendance_img_label = tk.Label(attendance_tab, image=attendance_img)
-                    attendance_img_label.image = attendance_img  # Keep a reference
-                    attendance_img_label.pack(pady=10)
-                
-                # Marks tab
-                if 'marks' in report['plots']:
-                    marks_tab = tk.Frame(notebook)
-                    notebook.add(marks_tab, text="Marks")
-                    
-                    marks_img = tk.PhotoImage(file=report['plots']['marks'])
-                    marks_img_label = tk.Label(marks_tab, image=marks_img)
-                    marks_img_label.image = marks_img  # Keep a reference
-                    marks_img_label.pack(pady=10)
-                
-                # Ensure the window comes to the front
-                report_window.lift()
-                report_window.attributes('-topmost', True)
-                report_window.after_idle(report_window.attributes, '-topmost', False)
-                
-                # Focus on the window
-                report_window.focus_force()
+                # The statistics show at once; each plot is rendered when its tab is opened
+                AnalysisReportWindow(self, self.admin.school, report)
                 
                 return True
             except Exception as e:
@@ -826,12 +957,117 @@ class ClassManagementFrame(tk.Frame):
         
         FormWindow(self, "Generate Analysis Report", fields, submit)
 
+class SchoolOverviewFrame(tk.Frame):
+    def __init__(self, parent, admin):
+        super().__init__(parent, bg="#8B0000")
+        self.admin = admin
+        
+        tk.Label(self, text="School Overview", font=("Arial", 20), bg="#8B0000", fg="#FFFFFF").pack(pady=10)
+        
+        # Button panel
+        button_panel = tk.Frame(self, bg="#8B0000")
+        button_panel.pack(pady=5)
+        
+        refresh_btn = tk.Button(button_panel, text="🔄", font=("Inter", 16), bg="#4CAF50", fg="white", 
+                              command=self.display_overview)
+        refresh_btn.grid(row=0, column=0, padx=5, pady=5)
+        tk.Button(button_panel, text="Export Data", font=("Inter", 16), command=self.export_data).grid(row=0, column=1, padx=5, pady=5)
+        
+        # Data view panel
+        self.data_panel = tk.Frame(self, bg="#FFFFFF")
+        self.data_panel.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        self.display_overview()
+    
+    def display_overview(self):
+        # Clear any existing widgets
+        for widget in self.data_panel.winfo_children():
+            widget.destroy()
+        
+        try:
+            overview = self.admin.school.school_overview()
+            
+            # Comparison chart of every class
+            chart = png_image(self.admin.school.overview_image())
+            chart_label = tk.Label(self.data_panel, image=chart, bg="#FFFFFF")
+            chart_label.image = chart  # Keep a reference to prevent garbage collection
+            chart_label.pack(pady=5)
+            
+            # Statistics of every class
+            st = ScrolledText(self.data_panel, font=("Consolas", 10))
+            st.pack(fill="both", expand=True, padx=5, pady=5)
+            st.insert(tk.END, overview.to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+            st.config(state=tk.DISABLED)
+        
+        except Exception as e:
+            error_label = tk.Label(self.data_panel, text=f"Failed to load school overview:\n{e}", 
+                              bg="#FFFFFF", fg="#FF0000", pady=10)
+            error_label.pack(fill="both", expand=True)
+
+    def export_data(self):
+        fields = [
+            ("Table", "attendance"),
+            ("Columns", ""),
+            ("Filters", ""),
+            ("Format", "csv")
+        ]
+        
+        def submit(values):
+            table = values["Table"].lower()
+            file_format = values["Format"].lower()
+            columns = [col.strip() for col in values["Columns"].split(",") if col.strip()] or None
+            try:
+                filters = parse_filters(values["Filters"])
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return False
+            
+            path = filedialog.asksaveasfilename(
+                title="Export To",
+                defaultextension=f".{file_format}",
+                initialfile=f"{table}.{file_format}",
+                filetypes=[(f"{file_format.upper()} Files", f"*.{file_format}"), ("All Files", "*.*")]
+            )
+            if not path:  # User canceled the file dialog
+                return False
+            
+            try:
+                result = self.admin.export(table, path, filters, columns, file_format)
+            except Exception as e:
+                messagebox.showerror("Export Error", str(e))
+                return False
+            messagebox.showinfo("Export Successful", f"Exported {result['rows']} rows to {result['path']}.")
+            return True
+        
+        FormWindow(self, "Export Data (Filters: ClassID=1; Date=2025-01-01..2025-03-31)", fields, submit)
+
+def parse_filters(text):
+    """
+    Parse export filters written as `column=value` pairs separated by semicolons; `low..high` is an inclusive
+    range and either end may be left out (e.g. `Date=2025-01-01..`).
+    """
+    filters = {}
+    for part in text.split(";"):
+        if not part.strip():
+            continue
+        if "=" not in part:
+            raise ValueError(f"Filters must be written as column=value, got {part.strip()!r}")
+        column, value = (item.strip() for item in part.split("=", 1))
+        if ".." in value:
+            low, high = (item.strip() or None for item in value.split("..", 1))
+            filters[column] = (low, high)
+        else:
+            filters[column] = value
+    return filters
+
 # ------------------ Teacher Dashboard ------------------
 class TeacherDashboard(tk.Frame):
     def __init__(self, parent, teacher):
         super().__init__(parent)
         self.teacher = teacher
         self.parent = parent
+        # Tables used by the teacher's screens
+        self.teacher.school.preload('students', 'attendance', 'schedules', 'lesson_plan')
         self.configure(width=1000, height=700)
         self.pack_propagate(0)
         
@@ -990,11 +1226,12 @@ class AttendanceManagementFrame(tk.Frame):
         btn_font = ("Inter", 16)
         tk.Button(button_panel, text="Mark Attendance", font=btn_font, command=self.mark_attendance).grid(row=0, column=0, padx=5, pady=5)
         tk.Button(button_panel, text="View Attendance Records", font=btn_font, command=self.view_attendance).grid(row=0, column=1, padx=5, pady=5)
+        tk.Button(button_panel, text="Class Roster", font=btn_font, command=self.mark_class_attendance).grid(row=0, column=2, padx=5, pady=5)
         
         # Add refresh button
         refresh_btn = tk.Button(button_panel, text="🔄", font=btn_font, bg="#4CAF50", fg="white", 
                               command=self.display_attendance_data)
-        refresh_btn.grid(row=0, column=2, padx=5, pady=5)
+        refresh_btn.grid(row=0, column=3, padx=5, pady=5)
         
         # Data view panel
         self.data_panel = tk.Frame(self, bg="#FFFFFF")
@@ -1009,7 +1246,7 @@ class AttendanceManagementFrame(tk.Frame):
             widget.destroy()
         
         try:
-            df = pd.read_csv("csv/attendance.csv")
+            df = self.teacher.school.attendance
             
             # Create a header with refresh time
             header_frame = tk.Frame(self.data_panel, bg="#FFFFFF")
@@ -1030,7 +1267,7 @@ class AttendanceManagementFrame(tk.Frame):
             st.config(state=tk.DISABLED)
             
         except Exception as e:
-            error_label = tk.Label(self.data_panel, text=f"Failed to read attendance.csv:\n{e}", 
+            error_label = tk.Label(self.data_panel, text=f"Failed to load attendance data:\n{e}", 
                                   bg="#FFFFFF", fg="#FF0000", pady=10)
             error_label.pack(fill="both", expand=True)
     
@@ -1060,6 +1297,92 @@ class AttendanceManagementFrame(tk.Frame):
         
         FormWindow(self, "Mark Attendance", fields, submit)
     
+    def mark_class_attendance(self):
+        fields = [
+            ("Class ID", ""),
+            ("Date (YYYY-MM-DD)", "")
+        ]
+        
+        def submit(values):
+            try:
+                class_id = int(values["Class ID"])
+            except ValueError:
+                messagebox.showerror("Error", "Class ID must be an integer.")
+                return False
+            
+            date_str = values["Date (YYYY-MM-DD)"]
+            if not date_str:
+                messagebox.showerror("Error", "Date is required.")
+                return False
+            
+            students = self.teacher.school.students
+            roster = students[students['class'] == class_id]
+            if roster.empty:
+                messagebox.showinfo("No Students", f"No students are enrolled in class {class_id}.")
+                return False
+            
+            self.open_roster(class_id, date_str, roster)
+            return True
+        
+        FormWindow(self, "Class Roster", fields, submit)
+    
+    def open_roster(self, class_id, date_str, roster):
+        roster_window = tk.Toplevel(self)
+        roster_window.title(f"Class {class_id} Roster - {date_str}")
+        roster_window.geometry("500x600")
+        roster_window.configure(bg="#FFFFFF")
+        
+        tk.Label(roster_window, text=f"Class {class_id} - {date_str}", font=("Arial", 16, "bold"), 
+                 bg="#FFFFFF", pady=10).pack()
+        tk.Label(roster_window, text="Tick the students who are present.", font=("Arial", 10), 
+                 bg="#FFFFFF", fg="#666666").pack()
+        
+        # Pre-fill statuses already recorded for this class and date
+        existing = self.teacher.school.attendance_report(class_id, date_str)
+        recorded = {} if existing is None else dict(zip(existing['StudentID'], existing['Status']))
+        
+        # Scrollable list of students
+        list_frame = tk.Frame(roster_window, bg="#FFFFFF")
+        list_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        list_canvas = Canvas(list_frame, bg="#FFFFFF", highlightthickness=0)
+        scrollbar = tk.Scrollbar(list_frame, orient="vertical", command=list_canvas.yview)
+        students_frame = tk.Frame(list_canvas, bg="#FFFFFF")
+        students_frame.bind("<Configure>", lambda event: list_canvas.configure(scrollregion=list_canvas.bbox("all")))
+        list_canvas.create_window((0, 0), window=students_frame, anchor="nw")
+        list_canvas.configure(yscrollcommand=scrollbar.set)
+        list_canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        
+        status_vars = {}
+        for student_id, name in zip(roster['student_id'], roster['name']):
+            present = str(recorded.get(student_id, 'present')).lower() == 'present'
+            var = tk.BooleanVar(value=present)
+            status_vars[student_id] = var
+            tk.Checkbutton(students_frame, text=f"{student_id} - {name}", variable=var, font=("Arial", 12), 
+                           bg="#FFFFFF", anchor="w").pack(fill="x", padx=10, pady=2)
+        
+        def set_all(present):
+            for var in status_vars.values():
+                var.set(present)
+        
+        def save():
+            statuses = {sid: 'present' if var.get() else 'absent' for sid, var in status_vars.items()}
+            try:
+                result = self.teacher.mark_class_attendance(class_id, date_str, statuses)
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            messagebox.showinfo("Success", f"Attendance saved: {result['inserted']} new, {result['updated']} updated.")
+            self.display_attendance_data()  # Refresh after making changes
+            roster_window.destroy()
+        
+        # Button row
+        roster_buttons = tk.Frame(roster_window, bg="#FFFFFF")
+        roster_buttons.pack(pady=10)
+        tk.Button(roster_buttons, text="All Present", font=("Inter", 12), command=lambda: set_all(True)).grid(row=0, column=0, padx=5)
+        tk.Button(roster_buttons, text="All Absent", font=("Inter", 12), command=lambda: set_all(False)).grid(row=0, column=1, padx=5)
+        tk.Button(roster_buttons, text="Save", font=("Inter", 12), bg="#4CAF50", fg="white", command=save).grid(row=0, column=2, padx=5)
+    
     def view_attendance(self):
         # New function to generate the attendance report
         fields = [
@@ -1126,8 +1449,8 @@ class StudentAssessmentFrame(tk.Frame):
             widget.destroy()
         
         try:
-            # Read students.csv which contains marks
-            df = pd.read_csv("csv/students.csv")
+            # The students table contains marks
+            df = self.teacher.school.students
             
             # Create a header with refresh time
             header_frame = tk.Frame(self.data_panel, bg="#FFFFFF")
@@ -1148,7 +1471,7 @@ class StudentAssessmentFrame(tk.Frame):
             st.config(state=tk.DISABLED)
             
         except Exception as e:
-            error_label = tk.Label(self.data_panel, text=f"Failed to read students.csv:\n{e}", 
+            error_label = tk.Label(self.data_panel, text=f"Failed to load student data:\n{e}", 
                                   bg="#FFFFFF", fg="#FF0000", pady=10)
             error_label.pack(fill="both", expand=True)
     
@@ -1190,76 +1513,14 @@ class StudentAssessmentFrame(tk.Frame):
                 class_id = int(values["Class ID"])
                 
                 # Generate the report
-                report = self.teacher.analysis_report(class_id)
+                report = self.teacher.analysis_report(class_id, plots=False)
                 
                 if 'error' in report:
                     messagebox.showerror("Error", f"Failed to generate report: {report['error']}")
                     return False
                 
-                # Create a new window to display the report
-                report_window = tk.Toplevel()
-                report_window.title(f"Analysis Report for {report.get('class_name', f'Class {class_id}')}")
-                report_window.geometry("800x600")
-                
-                # Create a notebook for tabs
-                notebook = ttk.Notebook(report_window)
-                notebook.pack(fill="both", expand=True, padx=10, pady=10)
-                
-                # Summary tab
-                summary_tab = tk.Frame(notebook)
-                notebook.add(summary_tab, text="Summary")
-                
-                # Display summary information
-                summary_text = (
-                    f"Class: {report.get('class_name', f'Class {class_id}')}\n\n"
-                    f"Attendance Statistics:\n"
-                    f"  - Total Records: {report['attendance']['count']}\n"
-                    f"  - Present Rate: {report['attendance']['present_rate']:.2f}%\n"
-                    f"  - Standard Deviation: {report['attendance']['std_dev']:.2f}%\n\n"
-                    f"Marks Statistics:\n"
-                    f"  - Total Students: {report['marks']['count']}\n"
-                    f"  - Average Mark: {report['marks']['average']:.2f}\n"
-                    f"  - Standard Deviation: {report['marks']['std_dev']:.2f}"
-                )
-                
-                summary_label = tk.Label(summary_tab, text=summary_text, justify="left", 
-                                        font=("Arial", 12), padx=20, pady=20)
-                summary_label.pack(anchor="nw")
-                
-                # Display summary plot if available
-                if 'summary' in report['plots']:
-                    summary_img = tk.PhotoImage(file=report['plots']['summary'])
-                    summary_img_label = tk.Label(summary_tab, image=summary_img)
-                    summary_img_label.image = summary_img  # Keep a reference to prevent garbage collection
-                    summary_img_label.pack(pady=10)
-                
-                # Attendance tab
-                if 'attendance' in report['plots']:
-                    attendance_tab = tk.Frame(notebook)
-                    notebook.add(attendance_tab, text="Attendance")
-                    
-                    attendance_img = tk.PhotoImage(file=report['plots']['attendance'])
-                    attendance_img_label = tk.Label(attendance_tab, image=attendance_img)
-                    attendance_img_label.image = attendance_img  # Keep a reference
-                    attendance_img_label.pack(pady=10)
-                
-                # Marks tab
-                if 'marks' in report['plots']:
-                    marks_tab = tk.Frame(notebook)
-                    notebook.add(marks_tab, text="Marks")
-                    
-                    marks_img = tk.PhotoImage(file=report['plots']['marks'])
-                    marks_img_label = tk.Label(marks_tab, image=marks_img)
-                    marks_img_label.image = marks_img  # Keep a reference
-                    marks_img_label.pack(pady=10)
-                
-                # Ensure the window comes to the front
-                report_window.lift()
-                report_window.attributes('-topmost', True)
-                report_window.after_idle(report_window.attributes, '-topmost', False)
-                
-                # Focus on the window
-                report_window.focus_force()
+                # The statistics show at once; each plot is rendered when its tab is opened
+                AnalysisReportWindow(self, self.teacher.school, report)
                 
                 return True
             except Exception as e:
@@ -1299,8 +1560,8 @@ class ProfileManagementFrame(tk.Frame):
     def display_profile_data(self, frame):
     # Show teacher profile information
         try:
-        # Read the employees CSV directly
-            employees_df = pd.read_csv("csv/employees.csv")
+        # Use the employees table already loaded by the school
+            employees_df = self.teacher.school.employees
         
         # Filter for this teacher's employee_id
             teacher_data = employees_df[employees_df['employee_id'] == self.teacher.employee_id]
@@ -1384,8 +1645,8 @@ class ProfileManagementFrame(tk.Frame):
         view_window.configure(bg="#FFFFFF")
         
         try:
-            # Read schedules to find classes assigned to this teacher
-            schedules_df = pd.read_csv("csv/schedules.csv")
+            # Look through schedules to find classes assigned to this teacher
+            schedules_df = self.teacher.school.schedules
             
             # Filter for this teacher's ID
             teacher_classes = schedules_df[schedules_df['TeacherID'] == self.teacher.employee_id]
@@ -2,9 +2,9 @@ class Admin:
     def __init__(self, school, username):
         self.school = school
         self.username = username
-        emp = self.school.employees[self.school.employees['username'] == username]
-        if not emp.empty:
-            self.employee_id = emp['employee_id'].values[0]
+        emp = self.school.get_row('employees', username, 'username')
+        if emp is not None:
+            self.employee_id = emp['employee_id']
 
     def add_employee(self, name, contact, position, username=None, password=None):
         return self.school.add_employee(name, contact, position, username, password)
@@ -16,7 +16,7 @@ class Admin:
         return self.school.update_employee(employee_id, name, contact, position, username, password)
 
     def add_student(self, name, age, class_id):
-        return self.school.add_student(name, age, class_id)
+        return self.school.add_student(age=age, name=name, class_id=class_id)
     
     def remove_student(self, name):
         self.school.remove_student(name)
@@ -27,20 +27,32 @@ class Admin:
     def assign_teacher_to_class(self, class_id, teacher_id, date):
         self.school.assign_teacher_to_class( class_id, teacher_id, date)
     
-    def analysis_report(self, class_id):
-        return self.school.analysis_report(class_id)
+    def analysis_report(self, class_id, plots=True):
+        return self.school.analysis_report(class_id, plots)
+
+    def generate_all_reports(self, class_ids=None, workers=None, progress=None):
+        return self.school.generate_all_reports(class_ids, workers, progress)
+
+    def export(self, table, path, filters=None, columns=None, format='csv'):
+        return self.school.export(table, path, filters, columns, format)
 
 class Teacher:
     def __init__(self, school, username):
         self.school = school
         self.username = username
-        emp = self.school.employees[self.school.employees['username'] == username]
-        if not emp.empty:
-            self.employee_id = emp['employee_id'].values[0]
+        emp = self.school.get_row('employees', username, 'username')
+        if emp is not None:
+            self.employee_id = emp['employee_id']
 
     def mark_attendance(self, class_id, student_id, date, status):
         self.school.mark_attendance(class_id, student_id, date, status)
 
+    def mark_class_attendance(self, class_id, date, statuses):
+        return self.school.mark_class_attendance(class_id, date, statuses)
+
+    def import_attendance_csv(self, paths, workers=None):
+        return self.school.import_attendance_csv(paths, workers)
+
     def update_attendance(self, attendance_id, class_id, student_id, date, status):
         return self.school.update_student(self, attendance_id, class_id, student_id, date, status)
 
@@ -62,5 +74,5 @@ class Teacher:
     def attendance_report(self, class_id, date):
         return self.school.attendance_report(class_id, date)
     
-    def analysis_report(self, class_id):
-        return self.school.analysis_report(class_id)
+    def analysis_report(self, class_id, plots=True):
+        return self.school.analysis_report(class_id, plots)
@@ -0,0 +1,282 @@
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import matplotlib
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+# Figures are built with the object-oriented Figure API instead of pyplot, so they can be drawn from worker
+# processes and background threads without touching the GUI's pyplot state.
+
+
+def init_worker():
+    """Process pool initializer: render with the non-interactive Agg backend."""
+    matplotlib.use('Agg')
+
+
+def attendance_figure(attendance_by_date, status_counts):
+    """Attendance rate over time next to the present/absent split."""
+    fig = Figure(figsize=(10, 6))
+
+    # Attendance over time
+    ax = fig.add_subplot(1, 2, 1)
+    attendance_by_date.plot(kind='line', marker='o', ax=ax)
+    ax.set_title('Attendance Rate Over Time')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Attendance Rate (%)')
+    ax.grid(True)
+
+    # Attendance distribution
+    ax = fig.add_subplot(1, 2, 2)
+    ax.pie(status_counts, labels=['Present', 'Absent'], autopct='%1.1f%%', colors=['#4CAF50', '#F44336'])
+    ax.set_title('Attendance Distribution')
+
+    fig.tight_layout()
+    return fig
+
+
+def marks_figure(marks, grade_counts):
+    """Histogram of marks next to the number of students with each grade."""
+    fig = Figure(figsize=(10, 6))
+
+    # Histogram of marks
+    ax = fig.add_subplot(1, 2, 1)
+    ax.hist(marks, bins=10, color='#2196F3', edgecolor='black')
+    ax.axvline(marks.mean(), color='red', linestyle='dashed', linewidth=2, label=f'Mean: {marks.mean():.2f}')
+    ax.set_title('Distribution of Student Marks')
+    ax.set_xlabel('Marks')
+    ax.set_ylabel('Number of Students')
+    ax.legend()
+    ax.grid(True)
+
+    # Grade distribution; grades nobody has are left off the chart
+    ax = fig.add_subplot(1, 2, 2)
+    grade_counts = grade_counts[grade_counts > 0]
+    ax.bar(grade_counts.index.astype(str), grade_counts.values, color='#FF9800')
+    ax.set_title('Grade Distribution')
+    ax.set_xlabel('Grade')
+    ax.set_ylabel('Number of Students')
+    ax.grid(True, axis='y')
+
+    fig.tight_layout()
+    return fig
+
+
+def summary_figure(report):
+    """The report's statistics as a text panel."""
+    fig = Figure(figsize=(12, 8))
+    fig.suptitle(f"Analysis Report for {report['class_name']} (ID: {report['class_id']})", fontsize=16)
+    summary_text = (
+        f"Attendance Statistics:\n"
+        f"  - Total Records: {report['attendance']['count']}\n"
+        f"  - Present Rate: {report['attendance']['present_rate']:.2f}%\n"
+        f"  - Standard Deviation: {report['attendance']['std_dev']:.2f}%\n\n"
+        f"Marks Statistics:\n"
+        f"  - Total Students: {report['marks']['count']}\n"
+        f"  - Average Mark: {report['marks']['average']:.2f}\n"
+        f"  - Standard Deviation: {report['marks']['std_dev']:.2f}"
+    )
+    fig.text(0.1, 0.5, summary_text, fontsize=12, bbox=dict(facecolor='#E3F2FD', alpha=0.5))
+    return fig
+
+
+def plot_names(report):
+    """Names of the plots an analysis report has data for: 'attendance', 'marks' and 'summary'."""
+    names = []
+    if report['attendance']['count']:
+        names.append('attendance')
+    if report['marks']['count']:
+        names += ['marks', 'summary']
+    return names
+
+
+# Figure of each analysis plot, and what it is drawn from
+ANALYSIS_FIGURES = {'attendance': attendance_figure, 'marks': marks_figure, 'summary': summary_figure}
+
+
+def analysis_figure_inputs(report, series, name):
+    """Arguments of the figure function of one analysis plot, from the report and series of School.analysis_stats()."""
+    if name == 'attendance':
+        return (series['attendance_by_date'], series['status_counts'])
+    if name == 'marks':
+        return (series['marks'], series['grade_counts'])
+    return ({key: report.get(key) for key in ('class_id', 'class_name', 'attendance', 'marks')},)
+
+
+# Bump when the look of any figure changes, so images cached by RenderCache are drawn again
+RENDER_VERSION = '1'
+
+
+def content_hash(*parts):
+    """SHA-256 of everything a figure is drawn from (pandas objects by value, other parts as JSON)."""
+    digest = hashlib.sha256(f"{RENDER_VERSION}/{matplotlib.__version__}".encode())
+    for part in parts:
+        if isinstance(part, (pd.Series, pd.DataFrame)):
+            digest.update(pd.util.hash_pandas_object(part, index=True).values.tobytes())
+            digest.update(json.dumps([str(part.index.dtype), list(map(str, getattr(part, 'columns', [])))]).encode())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+        digest.update(b'|')
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    Rendered PNG images stored under the hash of what they were drawn from, so unchanged figures are never drawn
+    twice. Files unused for more than max_age seconds, and the least recently used beyond max_files, are removed
+    by gc().
+    """
+
+    def __init__(self, directory='reports/.render_cache', max_files=500, max_age=30 * 24 * 3600, gc_every=50):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_age = max_age
+        # gc() runs after every gc_every new images
+        self.gc_every = gc_every
+        self.hits = 0
+        self.misses = 0
+        self._stored = 0
+
+    def path(self, key):
+        return os.path.join(self.directory, f'{key}.png')
+
+    def get(self, key):
+        """The cached image for `key` as PNG bytes, or None."""
+        try:
+            with open(self.path(key), 'rb') as png_file:
+                data = png_file.read()
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            # The modification time records the last use, for gc()
+            os.utime(self.path(key))
+        except OSError:
+            pass
+        return data
+
+    def put(self, key, data):
+        save_png(data, self.path(key))
+        self._stored += 1
+        if self.gc_every and self._stored % self.gc_every == 0:
+            self.gc()
+
+    def render(self, key, draw):
+        """The image for `key`, calling draw() for the figure and storing it only if it is not cached yet."""
+        data = self.get(key)
+        if data is None:
+            data = figure_png(draw())
+            self.put(key, data)
+        return data
+
+    def gc(self, max_files=None, max_age=None):
+        """Remove images unused for longer than max_age seconds and the oldest beyond max_files; returns the count."""
+        max_files = self.max_files if max_files is None else max_files
+        max_age = self.max_age if max_age is None else max_age
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.png')]
+        except OSError:
+            return 0
+        files = []
+        for entry in entries:
+            try:
+                files.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                pass
+        files.sort(reverse=True)
+        cutoff = time.time() - max_age if max_age is not None else None
+        removed = 0
+        for position, (used, path) in enumerate(files):
+            if (max_files is not None and position >= max_files) or (cutoff is not None and used < cutoff):
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+def figure_png(fig):
+    """Render a figure to PNG bytes in memory."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+
+def save_png(data, path):
+    """
+    Write PNG bytes to `path` through a temporary file, so another session never reads a half-written image.
+    A file that already holds exactly these bytes is left alone.
+    """
+    if os.path.exists(path) and os.path.getsize(path) == len(data):
+        with open(path, 'rb') as png_file:
+            if png_file.read() == data:
+                return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'wb') as png_file:
+        png_file.write(data)
+    os.replace(temp_path, path)
+
+
+def analysis_plot_path(class_id, name, out_dir='reports'):
+    return f"{out_dir}/class_{class_id}_{name}.png"
+
+
+def render_analysis_images(report, series, names=None, cache=None):
+    """
+    Render the figures of an analysis report to PNG bytes in memory; returns name -> bytes. Only figures with data
+    to show (and, if given, listed in `names`) are rendered. With a RenderCache, figures drawn from identical
+    inputs before are read back instead of being drawn.
+    """
+    images = {}
+    for name in plot_names(report):
+        if names is not None and name not in names:
+            continue
+        inputs = analysis_figure_inputs(report, series, name)
+        draw = lambda: ANALYSIS_FIGURES[name](*inputs)
+        images[name] = cache.render(content_hash(name, *inputs), draw) if cache else figure_png(draw())
+    return images
+
+
+def render_analysis_plots(report, series, out_dir='reports', names=None, cache=None):
+    """Save the figures of an analysis report as <out_dir>/class_<id>_<name>.png; returns name -> path."""
+    plots = {}
+    for name, data in render_analysis_images(report, series, names, cache).items():
+        plots[name] = analysis_plot_path(report['class_id'], name, out_dir)
+        save_png(data, plots[name])
+    return plots
+
+
+def overview_figure(overview, figsize=(7.5, 3.2)):
+    """Present rate and average mark of every class as side-by-side bars, from School.school_overview()."""
+    fig = Figure(figsize=figsize)
+    ax = fig.add_subplot(1, 1, 1)
+    positions = np.arange(len(overview))
+    width = 0.4
+    ax.bar(positions - width / 2, overview['present_rate'].fillna(0), width, label='Present Rate (%)',
+           color='#4CAF50')
+    ax.bar(positions + width / 2, overview['marks_mean'].fillna(0), width, label='Average Mark', color='#2196F3')
+    ax.set_xticks(positions)
+    ax.set_xticklabels(overview['class_name'], rotation=30, ha='right')
+    ax.set_ylim(0, 100)
+    ax.set_title('Class Comparison')
+    ax.legend(loc='upper right', fontsize=8)
+    ax.grid(True, axis='y')
+    fig.tight_layout()
+    return fig
+
+
+def render_overview_image(overview, cache=None):
+    """Render the class comparison chart to PNG bytes in memory (read back from a RenderCache if unchanged)."""
+    if cache:
+        return cache.render(content_hash('overview', overview), lambda: overview_figure(overview))
+    return figure_png(overview_figure(overview))
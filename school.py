@@ -1,12 +1,146 @@
 import pandas as pd
 import os
-import matplotlib.pyplot as plt
 import numpy as np
 import os
 import csv
+import json
+import threading
+import warnings
+import weakref
+import calendar
+import copy
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from storage import SQLiteStore
+from validation import REPORT_COLUMNS, SchemaValidator, ValidationError, row_errors
+from plots import (init_worker, render_analysis_plots, render_analysis_images, render_overview_image, save_png,
+                   analysis_plot_path, plot_names, RenderCache)
+
+# Binary snapshots of the CSVs use Feather when pyarrow is available, otherwise pandas' pickle format
+try:
+    import pyarrow  # noqa: F401
+    SNAPSHOT_FORMAT = 'feather'
+except ImportError:
+    SNAPSHOT_FORMAT = 'pickle'
+
+# Default letter grades as (lowest mark, mark the grade stops at, grade), in ascending order
+GRADE_SCALE = [
+    (0, 40, 'F'),
+    (40, 50, 'D'),
+    (50, 60, 'C'),
+    (60, 70, 'B'),
+    (70, 80, 'B+'),
+    (80, 90, 'A'),
+    (90, 101, 'A+')
+]
+
+# Tables an analysis report is computed from
+ANALYSIS_TABLES = ('schedules', 'attendance', 'students')
+
+# File formats School.export() can write
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+
+
+class ExportWriter:
+    """Write DataFrame chunks one after another to a csv, jsonl or parquet file (parquet needs pyarrow)."""
+
+    def __init__(self, path, format):
+        self.path = path
+        self.format = format
+        self.file = None
+        self.parquet = None
+
+    def __enter__(self):
+        if self.format == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ValueError("Parquet export requires pyarrow")
+        else:
+            self.file = open(self.path, 'w', newline='', encoding='utf-8')
+        return self
+
+    def write(self, chunk):
+        if self.format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self.parquet is None:
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                # Text columns that happen to be empty in the first chunk are still text
+                for position, field in enumerate(schema):
+                    if pa.types.is_null(field.type):
+                        schema = schema.set(position, field.with_type(pa.string()))
+                self.parquet = pq.ParquetWriter(self.path, schema)
+            self.parquet.write_table(pa.Table.from_pandas(chunk, schema=self.parquet.schema, preserve_index=False))
+            return
+        # Dates are written as YYYY-MM-DD, like the CSV files
+        dates = chunk.select_dtypes('datetime').columns
+        if len(dates):
+            chunk = chunk.assign(**{col: chunk[col].dt.strftime('%Y-%m-%d') for col in dates})
+        if self.format == 'csv':
+            chunk.to_csv(self.file, header=self.file.tell() == 0, index=False)
+        elif len(chunk):
+            text = chunk.to_json(orient='records', lines=True, force_ascii=False)
+            self.file.write(text if text.endswith('\n') else text + '\n')
+
+    def __exit__(self, *exc):
+        if self.parquet is not None:
+            self.parquet.close()
+        if self.file is not None:
+            self.file.close()
+
+def rows_frame(chunks):
+    """Concatenate buffered row chunks (lists of dicts or DataFrames) into a single DataFrame."""
+    frames, records = [], []
+    for chunk in chunks:
+        if isinstance(chunk, pd.DataFrame):
+            if records:
+                frames.append(pd.DataFrame(records))
+                records = []
+            frames.append(chunk)
+        else:
+            records.extend(chunk)
+    if records:
+        frames.append(pd.DataFrame(records))
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+def table_property(name):
+    """Expose a table as an attribute, loaded on first access, folding in rows buffered by append_rows() when read."""
+    def getter(self):
+        if name not in self._frames:
+            self.load_table(name)
+        if self._rollback is not None and name not in self._rollback:
+            # First access inside a batch: keep a copy to roll back to (buffered rows are restored separately)
+            self._rollback[name] = self._frames[name].copy()
+        pending = self._pending[name]
+        if pending:
+            self._pending[name] = []
+            old = self._frames[name]
+            new = self.coerce_types(name, rows_frame(pending), like=old)
+            # New rows get fresh labels after the existing ones, so labels already in the indexes stay valid
+            start = int(old.index.max()) + 1 if len(old) else 0
+            new.index = pd.RangeIndex(start, start + len(new))
+            self._frames[name] = pd.concat([old, new]) if len(old) else new
+            self._extend_indexes(name, old, new)
+        return self._frames[name]
+
+    def setter(self, frame):
+        self._frames[name] = frame
+        self.touch(name)
+
+    return property(getter, setter)
 
 class School:
-    def __init__(self):
+    employees = table_property('employees')
+    students = table_property('students')
+    attendance = table_property('attendance')
+    schedules = table_property('schedules')
+    lesson_plan = table_property('lesson_plan')
+
+    def __init__(self, journal=False, compact_threshold=1000, db_path=None, snapshots=True, preload=(),
+                 grade_scale=None, report_cache_size=32, render_cache_dir='reports/.render_cache'):
         # Define CSV files and their path
         self.csv_files = [
             ('csv/employees.csv', ['employee_id', 'name', 'contact', 'position', 'username', 'password', 'role']),
@@ -15,15 +149,91 @@ class School:
             ('csv/schedules.csv', ['classID', 'TeacherID', 'ClassName', 'Date', 'Duration', 'MaxStudents', 'Subject']),
             ('csv/lesson_plan.csv', ['LessonID','TeacherID','ClassID','Subject','LessonDetails','Date','LearningObjectives','Assessment'])
         ]
+        # Map each table attribute to its CSV file
+        self.table_files = {
+            'employees': 'csv/employees.csv',
+            'students': 'csv/students.csv',
+            'attendance': 'csv/attendance.csv',
+            'schedules': 'csv/schedules.csv',
+            'lesson_plan': 'csv/lesson_plan.csv'
+        }
+        # Column list of each table, as declared in csv_files
+        self.table_columns = {table: headers for table, file in self.table_files.items()
+                              for filename, headers in self.csv_files if filename == file}
+        # JSON Schema of each table from the schema folder, and the dtypes derived from it
+        self.schemas = self.load_schemas()
+        # Free-text columns that hold a small set of repeated values are stored as categoricals too
+        self.category_columns = {'employees': ['position'], 'schedules': ['Subject'], 'lesson_plan': ['Subject']}
+        self.dtypes = {table: self.schema_dtypes(table) for table in self.table_files}
+        # The schemas compiled into vectorized row checks, and the problems found in each table when it was loaded
+        self.validator = SchemaValidator(self.schemas, self.dtypes)
+        self.validation_errors = {}
+        # (row label, column) -> original value, for loaded values that could not be converted to the column's dtype
+        self._raw_cells = {}
+        # Primary key column of each table that has one
+        self.primary_keys = {
+            'employees': 'employee_id',
+            'students': 'student_id',
+            'attendance': 'AttendanceID',
+            'lesson_plan': 'LessonID'
+        }
+        # Columns with a hash index (value -> row label); username is used for logins
+        self.indexed_columns = {table: [key] for table, key in self.primary_keys.items()}
+        self.indexed_columns['employees'].append('username')
+        # Non-unique indexes (value or tuple of values -> list of row labels) for frequent filters
+        self.group_indexes = {'attendance': [('ClassID',), ('ClassID', 'Date')]}
+        self._indexes = {}
+        # Journal mode appends inserted rows to csv/<table>.journal instead of rewriting the table
+        self.journal = journal
+        self.compact_threshold = compact_threshold
+        self.journal_files = {table: os.path.splitext(file)[0] + '.journal' for table, file in self.table_files.items()}
+        # Columnar snapshot of each CSV, stamped with the CSV's mtime and size, used for fast startup
+        self.snapshots = snapshots
+        self.snapshot_files = {table: f"{os.path.splitext(file)[0]}.{SNAPSHOT_FORMAT}"
+                               for table, file in self.table_files.items()}
+        self.stamp_files = {table: os.path.splitext(file)[0] + '.stamp.json' for table, file in self.table_files.items()}
+        self._journal_rows = {table: 0 for table in self.table_files}
+        # Bumped whenever a base CSV is rewritten, so a stale background compaction can back off
+        self._base_versions = {table: 0 for table in self.table_files}
+        self._compactions = {}
+        self._io_lock = threading.RLock()
+        # Tables changed in memory since the last save, plus primary keys of individually changed/deleted rows
+        self._dirty = set()
+        self._dirty_rows = {table: set() for table in self.table_files}
+        self._deleted_rows = {table: set() for table in self.table_files}
+        # In-memory frames (a table is absent until it is first used), rows waiting to be concatenated
+        # and the next free primary key per table
+        self._frames = {}
+        self._load_locks = {table: threading.Lock() for table in self.table_files}
+        # Tables to warm in the background after every load_data()
+        self.preload_tables = tuple(preload)
+        # Version of each table, bumped by every change, and an LRU cache of reports keyed on the versions they read
+        self._versions = {table: 0 for table in self.table_files}
+        self.report_cache_size = report_cache_size
+        self._report_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Images stored on disk by a hash of what they are drawn from (None turns this off)
+        self.render_cache = RenderCache(render_cache_dir) if render_cache_dir else None
+        # Letter grades used by the reports
+        self.set_grade_scale(grade_scale or GRADE_SCALE)
+        self._pending = {table: [] for table in self.table_files}
+        self._next_ids = {}
+        # Batch state: nesting depth, rows inserted during the batch and pre-batch copies of the tables read
+        self._batch_depth = 0
+        self._batch_rows = {table: [] for table in self.table_files}
+        self._rollback = None
         # Ensure all CSV files exist
         for filename, headers in self.csv_files:
             self.ensure_csv_exists(filename, headers)
-        # Initialize DataFrames
-        self.employees = pd.DataFrame(columns=['employee_id', 'name', 'contact', 'position', 'username', 'password', 'role'])
-        self.students = pd.DataFrame(columns=['student_id', 'name', 'age', 'class', 'marks']) 
-        self.attendance = pd.DataFrame(columns=['date', 'class', 'student_id', 'status'])
-        self.schedules = pd.DataFrame(columns=['classID', 'TeacherID', 'ClassName', 'Date', 'Duration', 'MaxStudents', 'Subject'])
-        self.lesson_plan = pd.DataFrame(columns=['LessonID','TeacherID','ClassID','Subject','LessonDetails','Date','LearningObjectives','Assessment'])
+        # Optional SQLite storage; a new database is filled from the csv folder on first use
+        self.store = None
+        if db_path:
+            new_database = not os.path.exists(db_path)
+            self.store = SQLiteStore(db_path, self.table_columns, self.primary_keys, self.schemas)
+            if new_database:
+                self.migrate_to_sqlite()
         self.load_data()
 
     def ensure_csv_exists(self, filename, headers=None):
@@ -36,28 +246,913 @@ class School:
                     writer = csv.writer(csvfile)
                     writer.writerow(headers)
 
+    def load_schemas(self, schema_dir='schema'):
+        """Read the JSON Schema of each table from the schema folder."""
+        schemas = {}
+        for table in self.table_files:
+            path = os.path.join(schema_dir, f'{table}.json')
+            if os.path.exists(path):
+                with open(path) as schema_file:
+                    schemas[table] = json.load(schema_file)
+        return schemas
+
+    def schema_dtypes(self, table):
+        """
+        Map each column of a table to the dtype it is kept in, derived from its JSON Schema:
+        integers -> nullable Int32, numbers -> float64, dates -> datetime64, enums (and category_columns)
+        -> category, other strings -> object.
+        """
+        dtypes = {}
+        for column, spec in self.schemas.get(table, {}).get('properties', {}).items():
+            types = spec.get('type', 'string')
+            if isinstance(types, list):
+                types = next((t for t in types if t != 'null'), 'string')
+            if types == 'integer':
+                dtypes[column] = 'Int32'
+            elif types == 'number':
+                dtypes[column] = 'float64'
+            elif spec.get('format') == 'date':
+                dtypes[column] = 'datetime64[ns]'
+            elif 'enum' in spec or column in self.category_columns.get(table, []):
+                dtypes[column] = 'category'
+            else:
+                dtypes[column] = 'object'
+        return dtypes
+
+    def enum_values(self, table, column):
+        return self.schemas.get(table, {}).get('properties', {}).get(column, {}).get('enum', [])
+
+    @staticmethod
+    def to_date(value):
+        """Parse a date, or a Series of dates, written as YYYY-MM-DD with or without zero padding (invalid -> NaT)."""
+        return pd.to_datetime(value, format='%Y-%m-%d', errors='coerce')
+
+    def coerce_types(self, table, frame, like=None):
+        """
+        Convert a table's columns in place to the dtypes from schema_dtypes() and return the frame.
+        Enum values are lower-cased. With `like`, categorical columns share (and extend) the categories of
+        that frame's columns, so the two can be concatenated without falling back to object dtype.
+        """
+        for column, dtype in self.dtypes[table].items():
+            if column not in frame.columns:
+                continue
+            values = frame[column]
+            if dtype == 'datetime64[ns]':
+                if values.dtype != 'datetime64[ns]':
+                    frame[column] = self.to_date(values)
+            elif dtype == 'Int32':
+                if values.dtype != 'Int32':
+                    numbers = pd.to_numeric(values, errors='coerce')
+                    # Values with a fractional part cannot be Int32; keep them as floats for validation to report
+                    if (numbers.dropna() % 1 == 0).all():
+                        numbers = numbers.astype('Int32')
+                    frame[column] = numbers
+            elif dtype == 'float64':
+                frame[column] = pd.to_numeric(values, errors='coerce').astype('float64')
+            elif dtype == 'category':
+                enum = self.enum_values(table, column)
+                if not isinstance(values.dtype, pd.CategoricalDtype):
+                    values = values.where(values.isna(), values.astype(str).str.strip())
+                    if enum and all(v == v.lower() for v in enum):
+                        values = values.str.lower()
+                categories = list(enum)
+                if like is not None and isinstance(like[column].dtype, pd.CategoricalDtype):
+                    categories = list(like[column].cat.categories)
+                extra = [v for v in pd.unique(values.dropna()) if v not in set(categories)]
+                if extra:
+                    categories += extra
+                    if like is not None and isinstance(like[column].dtype, pd.CategoricalDtype):
+                        like[column] = like[column].cat.add_categories(extra)
+                frame[column] = values.astype(pd.CategoricalDtype(categories))
+            elif values.dtype != object or values.map(type).ne(str).any():
+                # Text columns keep numbers-as-text (contact numbers, passwords like '012') as strings
+                frame[column] = values.astype(object).where(values.isna(), values.astype(str))
+        return frame
+
+    def convert_value(self, table, column, value):
+        """Convert a single value to the dtype of a table column, raising ValueError if it does not fit."""
+        dtype = self.dtypes[table].get(column)
+        if value is None or (not isinstance(value, str) and pd.isna(value)):
+            return None
+        if dtype == 'Int32':
+            number = float(value)
+            if number % 1:
+                raise ValueError(f"{column} must be a whole number, got {value!r}")
+            return int(number)
+        if dtype == 'float64':
+            return float(value)
+        if dtype == 'datetime64[ns]':
+            date = self.to_date(value)
+            if pd.isna(date):
+                raise ValueError(f"{column} must be a date in YYYY-MM-DD format, got {value!r}")
+            return date
+        if dtype == 'category':
+            value = str(value).strip()
+            enum = self.enum_values(table, column)
+            if enum and all(v == v.lower() for v in enum):
+                value = value.lower()
+            return value
+        if dtype == 'object':
+            return str(value)
+        return value
+
+    def set_value(self, table, label, column, value):
+        """
+        Set one cell of a table, converting the value to the column's dtype (adding a category if needed).
+        Raises ValidationError (a ValueError) if the value does not match the table's schema.
+        """
+        self.set_values(table, label, {column: value})
+
+    def set_values(self, table, label, values):
+        """
+        Set several cells (column -> value) of one row. All values are validated and converted before any is
+        written, so if one does not match the table's schema (ValidationError) the row is left unchanged.
+        """
+        if not values:
+            return
+        changes = pd.DataFrame({column: pd.Series([value], dtype=object) for column, value in values.items()})
+        errors = self.validator.validate(table, changes, partial=True)
+        if not errors.empty:
+            raise ValidationError(table, errors)
+        values = {column: self.convert_value(table, column, value) for column, value in values.items()}
+        frame = getattr(self, table)
+        self.touch(table)
+        cells = self._raw_cells.get(table, {})
+        for column, value in values.items():
+            cells.pop((label, column), None)
+            if column in frame.columns and isinstance(frame[column].dtype, pd.CategoricalDtype):
+                if value is not None and value not in frame[column].cat.categories:
+                    frame[column] = frame[column].cat.add_categories([value])
+            frame.at[label, column] = value
+
+    def read_dtypes(self, table):
+        """dtype argument for pd.read_csv that keeps text columns as text (so '012' is not read as 12)."""
+        return {column: str for column, dtype in self.dtypes[table].items() if dtype in ('object', 'category')}
+
+    def memory_usage(self):
+        """Memory used by each table in bytes, including the contents of text columns."""
+        return pd.Series({table: int(getattr(self, table).memory_usage(deep=True).sum()) for table in self.table_files})
+
     def load_data(self):
-        """Load data from CSV files into DataFrames."""
-        for file, attr in [
-            ('csv/employees.csv', 'employees'),
-            ('csv/students.csv', 'students'),
-            ('csv/attendance.csv', 'attendance'),
-            ('csv/schedules.csv', 'schedules'),
-            ('csv/lesson_plan.csv', 'lesson_plan')
-        ]:
+        """
+        Discard the in-memory tables and reload them from storage. Employees is read straight away (it is needed
+        to log in); the other tables are read on first access, or in the background if listed in `preload`.
+        """
+        for table in self.table_files:
+            # Wait for a preload of this table that is already running
+            with self._load_locks[table]:
+                self._frames.pop(table, None)
+                self._pending[table] = []
+        # Everything in memory now matches what is stored
+        self._dirty.clear()
+        for table in self.table_files:
+            self._dirty_rows[table].clear()
+            self._deleted_rows[table].clear()
+        self._next_ids.clear()
+        self.touch(*self.table_files)
+        self.load_table('employees')
+        if self.preload_tables:
+            self.preload(*self.preload_tables)
+
+    def load_table(self, table):
+        """Read one table from the SQLite store or its CSV file (replaying any journaled rows) unless it is loaded."""
+        with self._load_locks[table]:
+            if table in self._frames:
+                return
+            if self.store:
+                frame, errors = self.check_raw(table, self.store.read_table(table))
+                self.record_problems(table, frame, errors)
+            elif os.path.exists(self.table_files[table]):
+                frame = self.read_csv_table(table)
+            else:
+                frame, errors = self.check_raw(table, pd.DataFrame(columns=self.table_columns[table]))
+                self.record_problems(table, frame, errors)
+            self._frames[table] = frame
+            # Rows edited outside the application are kept, but reported
+            errors = self.validation_errors[table]
+            if not errors.empty:
+                warnings.warn(f"{len(errors)} problem(s) in {table} do not match its schema "
+                              f"(see School.validation_errors['{table}'])")
+        if self.journal and self._journal_rows[table] >= self.compact_threshold:
+            self.compact(table, background=True)
+
+    def preload(self, *tables):
+        """
+        Load tables (all of them by default) on a background thread, so they are ready by the time they are used.
+        Returns the thread; reading a table before it finishes simply waits for that table.
+        """
+        tables = tables or tuple(self.table_files)
+        for table in tables:
+            if table not in self.table_files:
+                raise ValueError(f"Unknown table: {table}")
+
+        def load():
+            for table in tables:
+                self.load_table(table)
+
+        thread = threading.Thread(target=load, daemon=True)
+        thread.start()
+        return thread
+
+    def loaded_tables(self):
+        """Names of the tables currently held in memory."""
+        return [table for table in self.table_files if table in self._frames]
+
+    def check_raw(self, table, frame, like=None):
+        """
+        Validate a frame as read from storage, then convert it with coerce_types(). Returns (frame, errors).
+        Checking first reports a bad date or ID with its original value, where after coercion it would only be
+        missing.
+        """
+        errors = self.validator.validate(table, frame)
+        return self.coerce_types(table, frame, like=like), errors
+
+    def read_csv_table(self, table):
+        """
+        Read a table from its CSV file (or its up-to-date snapshot), including rows still in its journal.
+        The problems found in the file are recorded in validation_errors[table].
+        """
+        frame = self.read_snapshot(table) if self.snapshots else None
+        if frame is None:
+            frame, errors = self.check_raw(table, pd.read_csv(self.table_files[table], dtype=self.read_dtypes(table)))
+            # A snapshot holds coerced values, so a file with problems is always read from the CSV, to report them
+            # with their original values
+            if self.snapshots and errors.empty:
+                self.write_snapshot(table, frame)
+        else:
+            # Snapshots written before a schema change are brought up to date
+            frame = self.coerce_types(table, frame)
+            errors = self.validator.validate(table, frame)
+        frame, journal_errors = self._replay_journal(table, frame)
+        if not journal_errors.empty:
+            errors = pd.concat([errors, journal_errors], ignore_index=True)
+        self.record_problems(table, frame, errors)
+        return frame
+
+    def record_problems(self, table, frame, errors):
+        """
+        Keep the validation report of a table as read from storage, and the original text of the values that
+        coerce_types() could not convert (a bad date or ID), which storage_frame() writes back instead of blanks.
+        """
+        self.validation_errors[table] = errors
+        bad = errors[errors['row'].notna() & errors['value'].notna()]
+        self._raw_cells[table] = {(label, column): value for label, column, value
+                                  in zip(bad['row'], bad['column'], bad['value'])
+                                  if pd.isna(frame.at[label, column])}
+
+    def storage_frame(self, table, frame):
+        """
+        The rows of a table as they are written to storage: values that could not be converted when the table was
+        loaded are written back as they were read (until they are edited), so rewriting the table keeps them.
+        """
+        cells = self._raw_cells.get(table)
+        if not cells:
+            return frame
+        frame = frame.copy()
+        for column in {column for _, column in cells}:
+            values = frame[column]
+            if pd.api.types.is_datetime64_any_dtype(values.dtype):
+                values = values.dt.strftime('%Y-%m-%d')
+            frame[column] = values.astype(object)
+        for (label, column), value in cells.items():
+            if label in frame.index:
+                frame.at[label, column] = value
+        return frame
+
+    def csv_stamp(self, table):
+        """Modification time and size of a table's CSV, used to tell whether its snapshot is current."""
+        stat = os.stat(self.table_files[table])
+        return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'format': SNAPSHOT_FORMAT}
+
+    def read_snapshot(self, table):
+        """Load a table from its snapshot if the snapshot matches the current CSV, otherwise return None."""
+        stamp_file = self.stamp_files[table]
+        snapshot_file = self.snapshot_files[table]
+        if not (os.path.exists(stamp_file) and os.path.exists(snapshot_file)):
+            return None
+        try:
+            with open(stamp_file) as f:
+                if json.load(f) != self.csv_stamp(table):
+                    return None
+            if SNAPSHOT_FORMAT == 'feather':
+                return pd.read_feather(snapshot_file)
+            return pd.read_pickle(snapshot_file)
+        except Exception:
+            # A damaged snapshot is simply rebuilt from the CSV
+            return None
+
+    def write_snapshot(self, table, frame):
+        """Write a snapshot of a table's CSV contents, stamped with the CSV's current mtime and size."""
+        stamp_file = self.stamp_files[table]
+        snapshot_file = self.snapshot_files[table]
+        try:
+            # Remove the old stamp first so a half-written snapshot is never mistaken for a current one
+            if os.path.exists(stamp_file):
+                os.remove(stamp_file)
+            if SNAPSHOT_FORMAT == 'feather':
+                frame.reset_index(drop=True).to_feather(snapshot_file)
+            else:
+                frame.to_pickle(snapshot_file)
+            with open(stamp_file, 'w') as f:
+                json.dump(self.csv_stamp(table), f)
+        except Exception:
+            # Columns Feather cannot store (e.g. mixed types) just mean this table is read from the CSV next time
+            if os.path.exists(snapshot_file):
+                os.remove(snapshot_file)
+
+    def migrate_to_sqlite(self):
+        """One-shot copy of every table in the csv folder (journals included) into the SQLite store."""
+        for table, file in self.table_files.items():
             if os.path.exists(file):
-                setattr(self, attr, pd.read_csv(file))
+                self.store.replace_table(table, self.storage_frame(table, self.read_csv_table(table)))
+
+    def _replay_journal(self, table, frame):
+        """
+        Append the rows recorded in a table's journal to the frame loaded from its base CSV.
+        Returns (frame, errors), with the problems in the replayed rows labelled as in the returned frame.
+        """
+        journal_file = self.journal_files[table]
+        self._journal_rows[table] = 0
+        errors = pd.DataFrame(columns=REPORT_COLUMNS)
+        if not os.path.exists(journal_file) or os.path.getsize(journal_file) == 0:
+            return frame, errors
+        replay = pd.read_csv(journal_file, header=None, names=list(frame.columns), dtype=self.read_dtypes(table))
+        replay, errors = self.check_raw(table, replay, like=frame)
+        key = self.primary_keys.get(table)
+        if key and not frame.empty:
+            # Rows already folded into the base by an interrupted compaction are skipped
+            replay = replay[(replay[key] > frame[key].max()).fillna(True)]
+        self._journal_rows[table] = len(replay)
+        # The replayed rows are renumbered after the base rows
+        labels = pd.Series(range(len(frame), len(frame) + len(replay)), index=replay.index)
+        errors = errors[errors['row'].isin(labels.index)]
+        errors = errors.assign(row=labels.reindex(errors['row']).values)
+        if replay.empty:
+            return frame, errors
+        return pd.concat([frame, replay], ignore_index=True), errors
+
+    def mark_dirty(self, *tables):
+        """Flag tables as changed so the next save_data() writes them."""
+        for table in tables:
+            if table not in self.table_files:
+                raise ValueError(f"Unknown table: {table}")
+            self._dirty.add(table)
+            self.touch(table)
+
+    def mark_rows_dirty(self, table, keys):
+        """Flag rows (by primary key) as changed; SQLite storage then writes only those rows."""
+        if table not in self.primary_keys:
+            self.mark_dirty(table)
+            return
+        self._dirty_rows[table].update(keys)
+        self.touch(table)
+
+    def mark_rows_deleted(self, table, keys):
+        """Flag rows (by primary key) as removed; SQLite storage then deletes only those rows."""
+        if table not in self.primary_keys:
+            self.mark_dirty(table)
+            return
+        self._deleted_rows[table].update(keys)
+        self.touch(table)
+
+    def touch(self, *tables):
+        """Bump the version of tables whose contents changed, so cached reports built from them are not reused."""
+        for table in tables:
+            self._versions[table] += 1
+
+    def cached_report(self, kind, key, tables, build, valid=None):
+        """
+        Return the `kind` report for `key` from the report cache, calling build() on a miss.
+        Entries are keyed on (key, kind, versions of `tables`), so any change to those tables makes them stale;
+        `valid` can reject an entry for other reasons. The least recently used entries are dropped beyond
+        report_cache_size.
+        """
+        cache_key = (key, kind, tuple(self._versions[table] for table in tables))
+        # Plots are rendered on background threads, so the cache itself is guarded (builds run outside the lock)
+        with self._cache_lock:
+            if cache_key in self._report_cache and (valid is None or valid(self._report_cache[cache_key])):
+                self._report_cache.move_to_end(cache_key)
+                self.cache_hits += 1
+                return copy.deepcopy(self._report_cache[cache_key])
+            self.cache_misses += 1
+        report = build()
+        # Reports that failed are not kept, so the next call tries again
+        result = report[0] if isinstance(report, tuple) else report
+        if self.report_cache_size > 0 and not (isinstance(result, dict) and 'error' in result):
+            with self._cache_lock:
+                self._report_cache[cache_key] = copy.deepcopy(report)
+                while len(self._report_cache) > self.report_cache_size:
+                    self._report_cache.popitem(last=False)
+        return report
+
+    def clear_report_cache(self):
+        with self._cache_lock:
+            self._report_cache.clear()
+
+    def clean_render_cache(self, max_files=None, max_age=None):
+        """Remove stale images from the render cache (see plots.RenderCache.gc); returns how many were removed."""
+        return self.render_cache.gc(max_files, max_age) if self.render_cache else 0
+
+    def report_cache_stats(self):
+        """Hits, misses and current and maximum number of entries of the report cache."""
+        return {'hits': self.cache_hits, 'misses': self.cache_misses,
+                'size': len(self._report_cache), 'max_size': self.report_cache_size}
+
+    def unsaved_tables(self):
+        """Tables with in-memory changes that have not been written yet."""
+        return [t for t in self.table_files
+                if t in self._dirty or self._dirty_rows[t] or self._deleted_rows[t] or self._batch_rows[t]]
+
+    @contextmanager
+    def batch(self):
+        """
+        Group many changes into one save.
+        Inside the block mutators skip their automatic save_data(), new rows are concatenated once, and each
+        affected table is written once on exit. If the block raises, all tables roll back to their pre-batch state.
+        """
+        if self._batch_depth:
+            # Nested batches join the outer one
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+            return
+
+        saved_pending = {table: list(chunks) for table, chunks in self._pending.items()}
+        saved_dirty = (set(self._dirty),
+                       {t: set(keys) for t, keys in self._dirty_rows.items()},
+                       {t: set(keys) for t, keys in self._deleted_rows.items()})
+        saved_ids = dict(self._next_ids)
+        saved_cells = {table: dict(cells) for table, cells in self._raw_cells.items()}
+        self._rollback = {}
+        self._batch_depth = 1
+        try:
+            yield self
+        except BaseException:
+            for table, frame in self._rollback.items():
+                self._frames[table] = frame
+            self.touch(*self.table_files)
+            self._pending = saved_pending
+            self._dirty, self._dirty_rows, self._deleted_rows = saved_dirty
+            self._next_ids = saved_ids
+            self._raw_cells = saved_cells
+            self._batch_rows = {table: [] for table in self.table_files}
+            raise
+        finally:
+            self._batch_depth = 0
+            self._rollback = None
+
+        for table, chunks in self._batch_rows.items():
+            if chunks:
+                self._batch_rows[table] = []
+                self._persist_rows(table, rows_frame(chunks))
+        self.save_data()
+
+    def save_data(self, force=False):
+        """
+        Save changed DataFrames to their CSV files or the SQLite store.
+        Only tables flagged with mark_dirty()/mark_rows_dirty()/mark_rows_deleted() are written;
+        pass force=True to rewrite every table. Inside batch() saving waits until the batch ends.
+        """
+        if self._batch_depth:
+            return
+        tables = list(self.table_files) if force else self.unsaved_tables()
+        with self._io_lock:
+            for table in tables:
+                if self.store:
+                    self._save_to_store(table, whole=force or table in self._dirty)
+                else:
+                    frame = getattr(self, table)
+                    self.storage_frame(table, frame).to_csv(self.table_files[table], index=False)
+                    # A snapshot could not hold the original text of unconverted values
+                    if self.snapshots and not self._raw_cells.get(table):
+                        self.write_snapshot(table, frame)
+                    # The base file now holds every row, so the journal is no longer needed
+                    self._base_versions[table] += 1
+                    self._truncate_journal(table)
+                self._dirty.discard(table)
+                self._dirty_rows[table].clear()
+                self._deleted_rows[table].clear()
+
+    def _save_to_store(self, table, whole):
+        """Write a table's changes to SQLite: the whole table, or just its changed and deleted rows."""
+        frame = getattr(self, table)
+        if whole:
+            self.store.replace_table(table, self.storage_frame(table, frame))
+            return
+        if self._deleted_rows[table]:
+            self.store.delete_rows(table, self._deleted_rows[table])
+        if self._dirty_rows[table]:
+            labels = [self.lookup(table, key) for key in self._dirty_rows[table]]
+            rows = frame.loc[[label for label in labels if label is not None]]
+            self.store.insert_rows(table, self.storage_frame(table, rows), replace=True)
+
+    def _index(self, table, column):
+        """Hash index of a column (value -> row label), rebuilt if the table's DataFrame has been replaced."""
+        frame = getattr(self, table)
+        entry = self._indexes.get((table, column))
+        if entry is None or entry[0]() is not frame:
+            values = frame[column].dropna()
+            # Build from the end so the first row wins when a value repeats
+            values = values.iloc[::-1]
+            entry = (weakref.ref(frame), dict(zip(values, values.index)))
+            self._indexes[(table, column)] = entry
+        return entry[1]
+
+    def _group_index(self, table, columns):
+        """Non-unique index of a table on a tuple of columns: key -> list of row labels."""
+        frame = getattr(self, table)
+        entry = self._indexes.get((table, columns))
+        if entry is None or entry[0]() is not frame:
+            # groupby keys are scalars for one column and tuples for several, matching group_key()
+            positions = frame.groupby(list(columns), sort=False).indices
+            labels = frame.index.values
+            entry = (weakref.ref(frame), {key: labels[pos].tolist() for key, pos in positions.items()})
+            self._indexes[(table, columns)] = entry
+        return entry[1]
+
+    @staticmethod
+    def group_key(columns, row):
+        """Key of a row (anything indexable by column name) in a group index on `columns`."""
+        if len(columns) == 1:
+            return row[columns[0]]
+        return tuple(row[col] for col in columns)
+
+    def _extend_indexes(self, table, old, new):
+        """Add rows appended to a table to any index built on its previous DataFrame."""
+        for column in self.indexed_columns.get(table, []):
+            entry = self._indexes.get((table, column))
+            if entry is None or entry[0]() is not old:
+                continue
+            index = entry[1]
+            for value, label in zip(new[column], new.index):
+                if pd.notna(value):
+                    index.setdefault(value, label)
+            self._indexes[(table, column)] = (weakref.ref(self._frames[table]), index)
+        for columns in self.group_indexes.get(table, []):
+            entry = self._indexes.get((table, columns))
+            if entry is None or entry[0]() is not old:
+                continue
+            index = entry[1]
+            keys = new[columns[0]] if len(columns) == 1 else zip(*(new[col] for col in columns))
+            for key, label in zip(keys, new.index):
+                index.setdefault(key, []).append(label)
+            self._indexes[(table, columns)] = (weakref.ref(self._frames[table]), index)
+        if table == 'attendance':
+            counts = self._current_attendance_counts(old)
+            if counts is not None:
+                self._count_attendance(counts, new, 1)
+                self._indexes[('attendance', 'counts')] = (weakref.ref(self._frames[table]), counts)
+
+    def _regroup_row(self, table, label, before):
+        """Move a row between group index buckets after an in-place update; `before` holds its old values."""
+        row = getattr(self, table).loc[label]
+        for columns in self.group_indexes.get(table, []):
+            entry = self._indexes.get((table, columns))
+            if entry is None:
+                continue
+            old_key, new_key = self.group_key(columns, before), self.group_key(columns, row)
+            if old_key == new_key:
+                continue
+            index = entry[1]
+            bucket = index.get(old_key, [])
+            if label in bucket:
+                bucket.remove(label)
+                if not bucket:
+                    del index[old_key]
+            index.setdefault(new_key, []).append(label)
+
+    def attendance_rows(self, class_id, date=None):
+        """Attendance records of one class, or of one class on one date, fetched through the attendance indexes."""
+        if date is None:
+            labels = self._group_index('attendance', ('ClassID',)).get(class_id, [])
+        else:
+            labels = self._group_index('attendance', ('ClassID', 'Date')).get((class_id, self.to_date(date)), [])
+        return self.attendance.loc[labels]
+
+    def attendance_counts(self):
+        """
+        Running attendance counts as (school, classes, days): school is [present, total], classes maps
+        class_id -> [present, total] and days maps class_id -> {date: [present, total]}.
+        Built from the attendance table when it is loaded or replaced, then kept up to date by the mutators.
+        """
+        frame = self.attendance
+        counts = self._current_attendance_counts(frame)
+        if counts is None:
+            counts = ([0, 0], {}, {})
+            self._count_attendance(counts, frame, 1)
+            self._indexes[('attendance', 'counts')] = (weakref.ref(frame), counts)
+        return counts
+
+    def _current_attendance_counts(self, frame):
+        """The running counts if they were built on `frame`, otherwise None."""
+        entry = self._indexes.get(('attendance', 'counts'))
+        if entry is None or entry[0]() is not frame:
+            return None
+        return entry[1]
+
+    def _count_attendance(self, counts, rows, sign):
+        """Add (sign=1) or take away (sign=-1) attendance rows from the running counts, one group at a time."""
+        if rows.empty:
+            return
+        flags = pd.DataFrame({'ClassID': rows['ClassID'], 'Date': rows['Date'],
+                              'present': self.present_flags(rows['Status'])})
+        groups = flags.groupby(['ClassID', 'Date'], sort=False)['present'].agg(['sum', 'size'])
+        for (class_id, date), (present, total) in zip(groups.index, groups.values.tolist()):
+            self._count_attendance_group(counts, class_id, date, sign * present, sign * total)
+
+    @staticmethod
+    def _count_attendance_group(counts, class_id, date, present, total):
+        """Adjust the school, class and (class, date) counts by `present` and `total` in constant time."""
+        school, classes, days = counts
+        school[0] += present
+        school[1] += total
+        for bucket, key in ((classes, class_id), (days.setdefault(class_id, {}), date)):
+            entry = bucket.setdefault(key, [0, 0])
+            entry[0] += present
+            entry[1] += total
+            if entry[1] <= 0:
+                del bucket[key]
+        if not days[class_id]:
+            del days[class_id]
+
+    def _recount_attendance_row(self, label, before):
+        """Move an updated attendance row between the running counts; `before` holds its old ClassID, Date and Status."""
+        counts = self._current_attendance_counts(self.attendance)
+        if counts is None:
+            return
+        row = self.attendance.loc[label]
+        for values, sign in ((before, -1), (row, 1)):
+            if pd.notna(values['ClassID']) and pd.notna(values['Date']):
+                self._count_attendance_group(counts, values['ClassID'], values['Date'],
+                                             sign * int(values['Status'] == 'present'), sign)
+
+    def attendance_stats(self, class_id=None, date=None):
+        """
+        Attendance KPIs read from the running counts: number present, total records, present rate and standard
+        deviation (both in %), for the whole school, one class, or one class on one date.
+        """
+        school, classes, days = self.attendance_counts()
+        if class_id is None:
+            present, total = school
+        elif date is None:
+            present, total = classes.get(class_id, (0, 0))
+        else:
+            present, total = days.get(class_id, {}).get(self.to_date(date), (0, 0))
+        rate = present / total if total else 0
+        # Sample standard deviation of the 0/1 statuses, as pandas' std() computes it
+        std_dev = np.sqrt(rate * (1 - rate) * total / (total - 1)) if total > 1 else np.nan
+        return {'present': present, 'total': total, 'present_rate': rate * 100, 'std_dev': std_dev * 100}
+
+    def attendance_by_date(self, class_id):
+        """Present rate (%) of a class on each date it has attendance, in date order."""
+        days = self.attendance_counts()[2].get(class_id, {})
+        rates = pd.Series({date: present / total * 100 for date, (present, total) in days.items()}, dtype='float64')
+        return rates.sort_index().rename_axis('Date')
+
+    def attendance_dated(self):
+        """
+        The attendance table on a sorted DatetimeIndex of its dates, for date-range queries.
+        Rebuilt on the first query after any change to the attendance table.
+        """
+        frame = self.attendance
+        version = self._versions['attendance']
+        entry = self._indexes.get(('attendance', 'Date'))
+        if entry is None or entry[0] != version:
+            dated = frame.dropna(subset=['Date']).set_index('Date', drop=False).sort_index(kind='stable')
+            entry = (version, dated)
+            self._indexes[('attendance', 'Date')] = entry
+        return entry[1]
+
+    def _date_bound(self, value, name):
+        """A start or end date as a Timestamp (None stays None), raising ValueError if it is not a valid date."""
+        if value is None:
+            return None
+        date = self.to_date(value)
+        if pd.isna(date):
+            raise ValueError(f"{name} must be a date in YYYY-MM-DD format, got {value!r}")
+        return date
+
+    def attendance_between(self, start=None, end=None, class_id=None, student_id=None):
+        """
+        Attendance records dated from `start` to `end` (both inclusive, either may be left open), optionally for
+        one class and/or one student, in date order.
+        """
+        dated = self.attendance_dated()
+        rows = dated.loc[self._date_bound(start, 'start'):self._date_bound(end, 'end')]
+        if class_id is not None:
+            rows = rows[rows['ClassID'] == class_id]
+        if student_id is not None:
+            rows = rows[rows['StudentID'] == student_id]
+        return rows.reset_index(drop=True)
+
+    def attendance_rates(self, start=None, end=None, by='ClassID'):
+        """
+        Present, total and present rate (%) per class (by='ClassID') or per student (by='StudentID') over the
+        records from `start` to `end`.
+        """
+        if by not in ('ClassID', 'StudentID'):
+            raise ValueError("by must be 'ClassID' or 'StudentID'")
+        rows = self.attendance_between(start, end)
+        rates = self.present_flags(rows['Status']).groupby(rows[by]).agg(['sum', 'size'])
+        rates.columns = ['present', 'total']
+        rates['present_rate'] = rates['present'] / rates['total'] * 100
+        return rates
+
+    def rolling_attendance(self, window=7, by='ClassID', class_id=None, student_id=None, start=None, end=None):
+        """
+        Present rate (%) over the trailing `window` days (e.g. 7 or 30), for each day from the first to the last
+        record, with one column per class (by='ClassID') or per student (by='StudentID'). Days with no records
+        count as empty; the rate is NaN while a window holds no records at all.
+        """
+        if by not in ('ClassID', 'StudentID'):
+            raise ValueError("by must be 'ClassID' or 'StudentID'")
+        if int(window) != window or window < 1:
+            raise ValueError(f"window must be a positive number of days, got {window!r}")
+        rows = self.attendance_between(start, end, class_id, student_id)
+        if rows.empty:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name='Date'))
+        flags = pd.DataFrame({'Date': rows['Date'], by: rows[by].astype('int64'),
+                              'present': self.present_flags(rows['Status']), 'total': 1})
+        daily = flags.pivot_table(index='Date', columns=by, values=['present', 'total'], aggfunc='sum', fill_value=0)
+        # One row per calendar day, so the window covers days rather than records
+        sums = daily.resample('D').sum().rolling(int(window), min_periods=1).sum()
+        rates = sums['present'] / sums['total'].where(sums['total'] > 0) * 100
+        rates.columns.name = by
+        return rates
+
+    def weekday_attendance(self, class_id=None, student_id=None, start=None, end=None):
+        """Present, total and present rate (%) for each day of the week, Monday to Sunday."""
+        rows = self.attendance_between(start, end, class_id, student_id)
+        flags = self.present_flags(rows['Status'])
+        weekdays = flags.groupby(rows['Date'].dt.dayofweek).agg(['sum', 'size']).reindex(range(7), fill_value=0)
+        weekdays.columns = ['present', 'total']
+        weekdays['present_rate'] = weekdays['present'] / weekdays['total'].where(weekdays['total'] > 0) * 100
+        weekdays.index = pd.Index(list(calendar.day_name), name='weekday')
+        return weekdays
+
+    def lookup(self, table, key, column=None):
+        """Return the row label for `key` in a table's primary key (or another indexed column), or None."""
+        column = column or self.primary_keys[table]
+        try:
+            return self._index(table, column).get(key)
+        except TypeError:
+            # Unhashable keys cannot match anything
+            return None
+
+    def get_row(self, table, key, column=None):
+        """Return the row for `key` as a Series, or None if there is no such row."""
+        label = self.lookup(table, key, column)
+        return None if label is None else getattr(self, table).loc[label]
 
-    def save_data(self):
-        """Save all DataFrames to CSV files."""
-        self.employees.to_csv('csv/employees.csv', index=False)
-        self.students.to_csv('csv/students.csv', index=False)
-        self.attendance.to_csv('csv/attendance.csv', index=False)
-        self.schedules.to_csv('csv/schedules.csv', index=False)
-        self.lesson_plan.to_csv('csv/lesson_plan.csv', index=False)
+    def remove_rows(self, table, keys):
+        """Remove rows by primary key, keep the table's indexes in step and flag the rows for deletion."""
+        key_col = self.primary_keys[table]
+        frame = getattr(self, table)
+        removed = frame[key_col].isin(keys)
+        if not removed.any():
+            return
+        dropped = frame[removed]
+        setattr(self, table, frame[~removed])
+        for columns in self.group_indexes.get(table, []):
+            entry = self._indexes.get((table, columns))
+            if entry is None or entry[0]() is not frame:
+                continue
+            index = entry[1]
+            for label, row in dropped.iterrows():
+                bucket = index.get(self.group_key(columns, row), [])
+                if label in bucket:
+                    bucket.remove(label)
+            self._indexes[(table, columns)] = (weakref.ref(self._frames[table]), index)
+        for column in self.indexed_columns.get(table, []):
+            entry = self._indexes.get((table, column))
+            if entry is None or entry[0]() is not frame:
+                continue
+            index = entry[1]
+            for value, label in zip(dropped[column].values, dropped.index):
+                if index.get(value) == label:
+                    del index[value]
+            self._indexes[(table, column)] = (weakref.ref(self._frames[table]), index)
+        if table == 'attendance':
+            counts = self._current_attendance_counts(frame)
+            if counts is not None:
+                self._count_attendance(counts, dropped, -1)
+                self._indexes[('attendance', 'counts')] = (weakref.ref(self._frames[table]), counts)
+        self.mark_rows_deleted(table, keys)
+
+    def next_id(self, table, count=1):
+        """Reserve `count` consecutive primary key values for new rows and return the first one."""
+        if table not in self._next_ids:
+            keys = getattr(self, table)[self.primary_keys[table]]
+            self._next_ids[table] = 1 if keys.dropna().empty else int(keys.max()) + 1
+        first = self._next_ids[table]
+        self._next_ids[table] += count
+        return first
+
+    def append_rows(self, table, records):
+        """
+        Add new rows (a list of dicts or a DataFrame) to a table without copying it.
+        The rows are buffered and concatenated on the next read of the table. With SQLite storage they are
+        inserted in one transaction and in journal mode appended to the table's journal straight away;
+        otherwise the table is flagged for save_data(). Inside batch() this happens once, when the batch ends.
+        Rows are checked against the table's schema first; if any fails, none is added and ValidationError is raised.
+        """
+        rows = rows_frame([records])
+        errors = self.validator.validate(table, rows)
+        if not errors.empty:
+            raise ValidationError(table, errors)
+        # Normalise once (on a copy, the caller's frame is left alone), so storage gets exactly the rows held in memory
+        rows = self.coerce_types(table, rows.copy())
+        # Load the table first, so rows written to storage below are not read back in on top of the buffered ones
+        self.load_table(table)
+        self._pending[table].append(rows)
+        self.touch(table)
+        if self._batch_depth:
+            self._batch_rows[table].append(rows)
+            return
+        self._persist_rows(table, rows)
+
+    def _persist_rows(self, table, rows):
+        """Write newly appended rows to storage, or flag the table when it has to be rewritten anyway."""
+        if table in self._dirty:
+            # The table is being rewritten in full, which includes these rows
+            return
+        if self.store:
+            self.store.insert_rows(table, rows)
+            return
+        if not self.journal:
+            self.mark_dirty(table)
+            return
+        with self._io_lock:
+            columns = list(self._frames[table].columns)
+            with open(self.journal_files[table], 'a', newline='') as journal_file:
+                rows.reindex(columns=columns).to_csv(journal_file, header=False, index=False)
+            self._journal_rows[table] += len(rows)
+        if self._journal_rows[table] >= self.compact_threshold:
+            self.compact(table, background=True)
+
+    def compact(self, table=None, background=False):
+        """
+        Fold journaled rows into the base CSV files and truncate the journals.
+        With background=True the CSV is rewritten on a worker thread while new rows keep going to the journal.
+        """
+        tables = [table] if table else list(self.table_files)
+        for name in tables:
+            running = self._compactions.get(name)
+            if running is not None and running.is_alive():
+                if not background:
+                    running.join()
+                else:
+                    continue
+            # Snapshot on the calling thread; the worker only touches files
+            with self._io_lock:
+                frame = self.storage_frame(name, getattr(self, name))
+                folded = self._journal_rows[name]
+                version = self._base_versions[name]
+            if folded == 0:
+                continue
+            if background:
+                worker = threading.Thread(target=self._compact_table, args=(name, frame, folded, version), daemon=True)
+                self._compactions[name] = worker
+                worker.start()
+            else:
+                self._compact_table(name, frame, folded, version)
+
+    def _compact_table(self, table, frame, folded, version):
+        """Write a snapshot of a table to its base CSV, then drop the first `folded` journal rows it covers."""
+        base_file = self.table_files[table]
+        # Unique per process and thread, so two sessions compacting the same table never share a temp file
+        temp_file = f"{base_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        frame.to_csv(temp_file, index=False)
+        with self._io_lock:
+            if self._base_versions[table] != version:
+                # save_data() rewrote the base in the meantime and it is already newer than this snapshot
+                os.remove(temp_file)
+                return
+            os.replace(temp_file, base_file)
+            if self.snapshots and not self._raw_cells.get(table):
+                self.write_snapshot(table, frame)
+            self._base_versions[table] += 1
+            self._truncate_journal(table, folded)
+
+    def _truncate_journal(self, table, rows=None):
+        """Drop the first `rows` records from a table's journal, or the whole journal when rows is None."""
+        journal_file = self.journal_files[table]
+        with self._io_lock:
+            if rows is None or rows >= self._journal_rows[table]:
+                if os.path.exists(journal_file):
+                    os.remove(journal_file)
+                self._journal_rows[table] = 0
+                return
+            with open(journal_file, newline='') as f:
+                remaining = list(csv.reader(f))[rows:]
+            with open(journal_file, 'w', newline='') as f:
+                csv.writer(f).writerows(remaining)
+            self._journal_rows[table] = len(remaining)
 
     def add_employee(self, name, contact, position, username=None, password=None):
-        new_id = 1 if self.employees.empty else self.employees['employee_id'].max() + 1
+        new_id = self.next_id('employees')
         role = position if position in ['admin', 'teacher'] else 'staff'
         employee_details = {
             'employee_id': new_id,
@@ -68,75 +1163,91 @@ class School:
             'password': password if position in ['admin', 'teacher'] else None,
             'role': role
         }
-        self.employees = pd.concat([self.employees, pd.DataFrame([employee_details])], ignore_index=True)
+        self.append_rows('employees', [employee_details])
         self.save_data()
         return new_id
 
     def remove_employee(self, employee_id):
-        self.employees = self.employees[self.employees['employee_id'] != employee_id]
+        self.remove_rows('employees', [employee_id])
         if 'teacher_id' in self.schedules.columns:
             self.schedules = self.schedules[self.schedules['teacher_id'] != employee_id]
+            self.mark_dirty('schedules')
         self.save_data()
 
     def update_employee(self, employee_id, name=None, contact=None, position=None, username=None, password=None):
-        if employee_id not in self.employees['employee_id'].values:
+        index = self.lookup('employees', employee_id)
+        if index is None:
             return False
-        index = self.employees[self.employees['employee_id'] == employee_id].index[0]
 
+        changes = {}
         if name:
-            self.employees.at[index, 'name'] = name
+            changes['name'] = name
         if contact:
-            self.employees.at[index, 'contact'] = contact
+            changes['contact'] = contact
         if position:
-            self.employees.at[index, 'position'] = position
+            changes['position'] = position
             # Adjust the role based on position
-            self.employees.at[index, 'role'] = position if position in ['admin', 'teacher'] else 'staff'
+            changes['role'] = position if position in ['admin', 'teacher'] else 'staff'
         if username:
-            self.employees.at[index, 'username'] = username
+            changes['username'] = username
         if password:
-            self.employees.at[index, 'password'] = password
+            changes['password'] = password
+        self.set_values('employees', index, changes)
+        if username:
+            # The username index is rebuilt on its next use
+            self._indexes.pop(('employees', 'username'), None)
+        self.mark_rows_dirty('employees', [employee_id])
         self.save_data()
 
     def add_student(self, age, name, class_id):
-        new_id = 1 if self.students.empty else self.students['student_id'].max() + 1
+        new_id = self.next_id('students')
         student_details = {'student_id': new_id, 'name': name, 'age': age, 'class': class_id}
-        self.students = pd.concat([self.students, pd.DataFrame([student_details])], ignore_index=True)
+        self.append_rows('students', [student_details])
         self.save_data()
 
     
 
     def remove_student(self, student_id):
-        self.students = self.students[self.students['student_id'] != student_id]
+        self.remove_rows('students', [student_id])
         self.save_data()
     
     def update_student(self, student_id, name=None, age=None, class_id=None, mark=None):
-        if student_id not in self.students['student_id'].values:
+        index = self.lookup('students', student_id)
+        if index is None:
             return False
-        index = self.students[self.students['student_id'] == student_id].index[0]
 
+        changes = {}
         if name:
-            self.students.at[index, 'name'] = name
+            changes['name'] = name
         if age:
-            self.students.at[index, 'age'] = age
+            changes['age'] = age
         if class_id:
-            self.students.at[index, 'class'] = class_id
+            changes['class'] = class_id
         if mark:
-            self.students.at[index, 'marks'] = mark
+            changes['marks'] = mark
+        self.set_values('students', index, changes)
+        self.mark_rows_dirty('students', [student_id])
         self.save_data()
 
     def update_teacher(self, employee_id, name=None, contact=None, username=None, password=None):
-        if employee_id not in self.employees['employee_id'].values:
+        index = self.lookup('employees', employee_id)
+        if index is None:
             return False
-        index = self.employees[self.employees['employee_id'] == employee_id].index[0]
 
+        changes = {}
         if name:
-            self.employees.at[index, 'name'] = name
+            changes['name'] = name
         if contact:
-            self.employees.at[index, 'contact'] = contact
+            changes['contact'] = contact
         if username:
-            self.employees.at[index, 'username'] = username
+            changes['username'] = username
         if password:
-            self.employees.at[index, 'password'] = password
+            changes['password'] = password
+        self.set_values('employees', index, changes)
+        if username:
+            # The username index is rebuilt on its next use
+            self._indexes.pop(('employees', 'username'), None)
+        self.mark_rows_dirty('employees', [employee_id])
         self.save_data()
     
     def assign_teacher_to_class(self, class_id, teacher_id, date_str):
@@ -148,16 +1259,17 @@ class School:
             return False
             
         # First, check if the teacher exists.
-        if teacher_id not in self.employees['employee_id'].values:
+        if self.lookup('employees', teacher_id) is None:
             return False
 
         # Find the row in schedules matching both the class_id and the converted date.
-        matching_rows = self.schedules[(self.schedules['classID'] == class_id) & (self.schedules['Date'] == date_str)]
+        matching_rows = self.schedules[(self.schedules['classID'] == class_id) & (self.schedules['Date'] == self.to_date(date_str))]
         
         # If a matching row exists, update its TeacherID.
         if not matching_rows.empty:
             row_index = matching_rows.index[0]
-            self.schedules.at[row_index, 'TeacherID'] = teacher_id
+            self.set_value('schedules', row_index, 'TeacherID', teacher_id)
+            self.mark_dirty('schedules')
             self.save_data()
             return True
         else:
@@ -165,44 +1277,105 @@ class School:
             return True
     
     def mark_attendance(self, class_id, student_id, date, status):
-        new_id = 1 if self.attendance.empty else self.attendance['AttendanceID'].max() + 1
+        new_id = self.next_id('attendance')
         attendance_record = {'AttendanceID': new_id,'ClassID': class_id, 'StudentID': student_id, 'Date': date, 'Status': status}
-        self.attendance = pd.concat([self.attendance, pd.DataFrame([attendance_record])], ignore_index=True)
+        self.append_rows('attendance', [attendance_record])
         self.save_data()
     
+    def mark_class_attendance(self, class_id, date, statuses):
+        """
+        Record attendance for a whole class on one date in a single save.
+        `statuses` maps student_id -> status: a dict or Series, a DataFrame with StudentID and Status columns,
+        or a sequence of (student_id, status) pairs. Students who already have a record for this class and date
+        are updated rather than given a second record. Returns the number of inserted and updated records.
+        """
+        if isinstance(statuses, pd.DataFrame):
+            roster = pd.Series(statuses['Status'].values, index=statuses['StudentID'].values)
+        elif isinstance(statuses, pd.Series):
+            roster = statuses
+        else:
+            roster = pd.Series(dict(statuses))
+        # IDs typed into the GUI arrive as text; convert them so existing records are found
+        class_id = self.convert_value('attendance', 'ClassID', class_id)
+        roster.index = [self.convert_value('attendance', 'StudentID', student_id) for student_id in roster.index]
+        roster = roster.astype(str).str.strip().str.lower()
+        # One record per student: the last status given wins
+        roster = roster[~roster.index.duplicated(keep='last')]
+        invalid = roster[~roster.isin(['present', 'absent'])]
+        if not invalid.empty:
+            raise ValueError(f"Status must be 'present' or 'absent' (student {invalid.index[0]}: {invalid.iloc[0]!r})")
+
+        # Students already marked for this class and date get their status updated
+        existing = self.attendance_rows(class_id, date)
+        existing = existing[~existing['StudentID'].duplicated()]
+        existing = pd.Series(existing.index, index=existing['StudentID'].values)
+        marked = roster.index.isin(existing.index)
+        if marked.any():
+            updates = roster[marked]
+            labels = existing.loc[updates.index].values
+            counts = self._current_attendance_counts(self.attendance)
+            if counts is not None:
+                self._count_attendance(counts, self.attendance.loc[labels], -1)
+            self.attendance.loc[labels, 'Status'] = updates.values
+            if counts is not None:
+                self._count_attendance(counts, self.attendance.loc[labels], 1)
+            self.mark_rows_dirty('attendance', self.attendance.loc[labels, 'AttendanceID'].tolist())
+
+        new = roster[~marked]
+        if not new.empty:
+            first_id = self.next_id('attendance', len(new))
+            self.append_rows('attendance', pd.DataFrame({
+                'AttendanceID': np.arange(first_id, first_id + len(new)),
+                'ClassID': class_id,
+                'StudentID': new.index.values,
+                'Date': date,
+                'Status': new.values
+            }))
+        self.save_data()
+        return {'inserted': len(new), 'updated': int(marked.sum())}
+
     def update_attendance(self, attendance_id, class_id, student_id, date, status):
-        if attendance_id not in self.attendance['AttendanceID'].values:
+        index = self.lookup('attendance', attendance_id)
+        if index is None:
             return False
-        index = self.attendance[self.attendance['AttendanceID'] == attendance_id].index[0]
+        before = self.attendance.loc[index, ['ClassID', 'Date', 'Status']]
 
+        changes = {}
         if class_id:
-            self.students.at[index, 'ClassID'] = class_id
+            changes['ClassID'] = class_id
         if student_id:
-            self.students.at[index, 'StudentID'] = student_id
+            changes['StudentID'] = student_id
         if date:
-            self.students.at[index, 'Date'] = date
+            changes['Date'] = date
         if status:
-            self.students.at[index, 'status'] = status
+            changes['Status'] = status
+        self.set_values('attendance', index, changes)
+        self._regroup_row('attendance', index, before)
+        self._recount_attendance_row(index, before)
+        self.mark_rows_dirty('attendance', [attendance_id])
         self.save_data()
     
     def update_student_mark(self, student_id, name=None, age=None, class_id=None, mark=None):
-        if student_id not in self.students['student_id'].values:
+        index = self.lookup('students', student_id)
+        if index is None:
             return False
-        index = self.students[self.students['student_id'] == student_id].index[0]
 
+        changes = {}
         if name:
-            self.students.at[index, 'name'] = name
+            changes['name'] = name
         if age:
-            self.students.at[index, 'age'] = age
+            changes['age'] = age
         if class_id:
-            self.students.at[index, 'class_id'] = class_id
+            changes['class'] = class_id
         if mark is not None:  # Use 'is not None' to allow for mark=0
-            self.students.at[index, 'mark'] = mark
+            changes['marks'] = mark
+        self.set_values('students', index, changes)
+        self.mark_rows_dirty('students', [student_id])
         self.save_data()
 
     def update_class_details(self, class_id, teacher_id, class_name, date, duration, max_students, subject):
         # First, check if the teacher exists
-        if teacher_id not in self.employees['employee_id'].values:
+        if self.lookup('employees', teacher_id) is None:
             return False
 
         # Look for rows in schedules with the matching class_id
@@ -210,21 +1383,23 @@ class School:
 
         if not matching_rows.empty:
             # Check if any of these rows already have the same date
-            same_date_rows = matching_rows[matching_rows['Date'] == date]
+            same_date_rows = matching_rows[matching_rows['Date'] == self.to_date(date)]
             if not same_date_rows.empty:
                 # If a row with the same date exists, update its fields.
                 # (Assuming only one row should be updated; if multiple exist, update the first occurrence.)
                 row_index = same_date_rows.index[0]
+                changes = {}
                 if class_name:
-                    self.schedules.at[row_index, 'ClassName'] = class_name
+                    changes['ClassName'] = class_name
                 if date:
-                    self.schedules.at[row_index, 'Date'] = date
+                    changes['Date'] = date
                 if duration:
-                    self.schedules.at[row_index, 'Duration'] = duration
+                    changes['Duration'] = duration
                 if max_students:
-                    self.schedules.at[row_index, 'MaxStudents'] = max_students
+                    changes['MaxStudents'] = max_students
                 if subject:
-                    self.schedules.at[row_index, 'Subject'] = subject
+                    changes['Subject'] = subject
+                self.set_values('schedules', row_index, changes)
             else:
                 # No matching date found for this class ID; create a new row.
                 new_row = {
@@ -236,8 +1411,8 @@ class School:
                     'MaxStudents': max_students,
                     'Subject': subject
                 }
-                # Insert at the next available index.
-                self.schedules.loc[len(self.schedules)] = new_row
+                # Append it as a new row.
+                self.append_rows('schedules', [new_row])
         else:
             # If no row with the given class_id exists, add a new row.
             new_row = {
@@ -249,13 +1424,14 @@ class School:
                 'MaxStudents': max_students,
                 'Subject': subject
             }
-            self.schedules.loc[len(self.schedules)] = new_row
+            self.append_rows('schedules', [new_row])
 
+        self.mark_dirty('schedules')
         self.save_data()
         return True
 
     def add_lesson_plan(self, teacher_id, class_id, subject, lesson_details, date, learning_objectives, assessment):
-        new_id = 1 if self.lesson_plan.empty else self.lesson_plan['LessonID'].max() + 1
+        new_id = self.next_id('lesson_plan')
         lesson_details = {
         'LessonID': new_id, 
         'TeacherID': teacher_id, 
@@ -266,38 +1442,173 @@ class School:
         'LearningObjectives': learning_objectives, 
         'Assessment': assessment,
         }
-        self.lesson_plan = pd.concat([self.lesson_plan, pd.DataFrame([lesson_details])], ignore_index=True)
+        self.append_rows('lesson_plan', [lesson_details])
         self.save_data()
         return new_id
 
     def update_lesson_plan(self, lesson_id, teacher_id, class_id, subject, lesson_details, date, materials, learning_objectives, assessment):
-        if teacher_id not in self.employees['employee_id'].values:
+        """
+        Update the supplied fields of a lesson plan. `materials` is accepted for the forms that ask for it, but the
+        lesson_plan table has no Materials column, so it is not stored.
+        """
+        if self.lookup('employees', teacher_id) is None:
+            return False
+        index = self.lookup('lesson_plan', lesson_id)
+        if index is None:
             return False
-        index = self.employees[self.employees['employee_id'] == teacher_id].index[0]
 
+        changes = {}
         if lesson_id:
-            self.lesson_plan.at[index, 'LessonID'] = lesson_id
+            changes['LessonID'] = lesson_id
         if class_id:
-            self.lesson_plan.at[index, 'ClassID'] = class_id
+            changes['ClassID'] = class_id
         if subject:
-            self.lesson_plan.at[index, 'Subject'] = subject
+            changes['Subject'] = subject
         if lesson_details:
-            self.lesson_plan.at[index, 'LessonDetails'] = lesson_details
+            changes['LessonDetails'] = lesson_details
         if date:
-            self.lesson_plan.at[index, 'Date'] = date
-        if materials:
-            self.lesson_plan.at[index, 'Materials'] = materials
+            changes['Date'] = date
         if learning_objectives:
-            self.lesson_plan.at[index, 'LearningObjectives'] = learning_objectives
+            changes['LearningObjectives'] = learning_objectives
         if assessment:
-            self.lesson_plan.at[index, 'Assessment'] = assessment
+            changes['Assessment'] = assessment
+        self.set_values('lesson_plan', index, changes)
+        self.mark_rows_dirty('lesson_plan', [lesson_id])
         self.save_data()
 
+    def select(self, table, filters=None):
+        """
+        Return the rows of a table whose columns equal the values in `filters`.
+        With SQLite storage the filter runs in SQL (using the table's indexes) unless the table has unsaved changes.
+        """
+        filters = {col: self.convert_value(table, col, value) for col, value in (filters or {}).items()}
+        if self.store and table not in self.unsaved_tables():
+            where = ' AND '.join(f'"{col}" = ?' for col in filters)
+            sql = f'SELECT * FROM "{table}"' + (f' WHERE {where}' if where else '')
+            return self.coerce_types(table, self.store.query(sql, tuple(filters.values())))
+        frame = getattr(self, table)
+        for columns in self.group_indexes.get(table, []):
+            if set(columns) == set(filters):
+                labels = self._group_index(table, columns).get(self.group_key(columns, filters), [])
+                return frame.loc[labels]
+        mask = pd.Series(True, index=frame.index)
+        for col, value in filters.items():
+            mask &= frame[col] == value
+        return frame[mask]
+
+    def export(self, table, path, filters=None, columns=None, format='csv', chunksize=50000):
+        """
+        Write the rows of a table matching `filters` to `path` as csv, jsonl (one JSON object per line) or parquet.
+        `filters` maps a column to a value it must equal, or to a (low, high) pair of inclusive bounds where either
+        may be None, e.g. {'ClassID': 1, 'Date': ('2025-01-01', '2025-03-31')}. `columns` limits and orders the
+        columns written. Rows are filtered and written `chunksize` at a time (in SQL with SQLite storage), so no
+        filtered copy of the table is built; the file only replaces `path` once it is complete.
+        Returns {'path': path, 'rows': rows written}.
+        """
+        if table not in self.table_files:
+            raise ValueError(f"Unknown table: {table}")
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Format must be one of {list(EXPORT_FORMATS)}, got {format!r}")
+        columns = list(columns or self.table_columns[table])
+        for col in columns + list(filters or {}):
+            if col not in self.table_columns[table]:
+                raise ValueError(f"Unknown column of {table}: {col}")
+        # Values are converted like select() does; a tuple or list is a range
+        bounds = {}
+        for col, value in (filters or {}).items():
+            if isinstance(value, (tuple, list)):
+                if self.dtypes[table].get(col) == 'category':
+                    # Categories have no order, so only equality filters make sense on them
+                    raise ValueError(f"{col} can only be filtered by a single value, not a range")
+                low, high = value
+                bounds[col] = (self.convert_value(table, col, low), self.convert_value(table, col, high))
+            else:
+                value = self.convert_value(table, col, value)
+                bounds[col] = (value, value)
+
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        rows = 0
+        try:
+            with ExportWriter(temp_path, format) as writer:
+                for chunk in self.export_chunks(table, bounds, chunksize):
+                    chunk = chunk[columns]
+                    writer.write(chunk)
+                    rows += len(chunk)
+                if rows == 0:
+                    # An empty export still gets the header/schema of the requested columns
+                    writer.write(self.coerce_types(table, pd.DataFrame(columns=columns)))
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return {'path': path, 'rows': rows}
+
+    def export_chunks(self, table, bounds, chunksize):
+        """Yield the rows of a table within `bounds` (column -> (low, high), None for open) in chunks."""
+        if self.store and table not in self.unsaved_tables():
+            conditions, params = [], []
+            for col, (low, high) in bounds.items():
+                if low is not None and low == high:
+                    conditions.append(f'"{col}" = ?')
+                    params.append(low)
+                    continue
+                if low is not None:
+                    conditions.append(f'"{col}" >= ?')
+                    params.append(low)
+                if high is not None:
+                    conditions.append(f'"{col}" <= ?')
+                    params.append(high)
+            sql = f'SELECT * FROM "{table}"' + (f" WHERE {' AND '.join(conditions)}" if conditions else '')
+            for chunk in self.store.query_chunks(sql, tuple(params), chunksize):
+                yield self.coerce_types(table, chunk)
+            return
+
+        frame = getattr(self, table)
+        equal = {col: low for col, (low, high) in bounds.items() if low is not None and low == high}
+        labels = None
+        for columns in self.group_indexes.get(table, []):
+            if set(columns) <= set(equal):
+                # Rows of an indexed group are fetched by label instead of scanning the table
+                labels = self._group_index(table, columns).get(self.group_key(columns, equal), [])
+                break
+        total = len(frame) if labels is None else len(labels)
+        for start in range(0, total, chunksize):
+            if labels is None:
+                chunk = frame.iloc[start:start + chunksize]
+            else:
+                chunk = frame.loc[labels[start:start + chunksize]]
+            mask = np.ones(len(chunk), dtype=bool)
+            for col, (low, high) in bounds.items():
+                if low is not None and low == high:
+                    mask &= (chunk[col] == low).fillna(False).to_numpy(dtype=bool)
+                    continue
+                if low is not None:
+                    mask &= (chunk[col] >= low).fillna(False).to_numpy(dtype=bool)
+                if high is not None:
+                    mask &= (chunk[col] <= high).fillna(False).to_numpy(dtype=bool)
+            if mask.any():
+                yield chunk[mask]
+
     def attendance_report(self, class_id, date):
-        attendance_data = self.attendance[
-            (self.attendance['ClassID'] == class_id) &
-            (self.attendance['Date'] == date)
-        ]
+        """Attendance records of a class on a date with student names (None if there are none); cached."""
+        return self.cached_report('attendance', (class_id, self.to_date(date)), ('attendance', 'students'),
+                                  lambda: self.build_attendance_report(class_id, date))
+
+    def build_attendance_report(self, class_id, date):
+        if self.store and not {'attendance', 'students'} & set(self.unsaved_tables()):
+            # Filter and join the student names in SQL
+            report = self.store.query(
+                'SELECT a."AttendanceID", a."ClassID", a."StudentID", s."name" AS "Student Name", a."Date", a."Status" '
+                'FROM attendance a LEFT JOIN students s ON s."student_id" = a."StudentID" '
+                'WHERE a."ClassID" = ? AND a."Date" = ?',
+                (int(class_id), self.convert_value('attendance', 'Date', date))
+            )
+            if report.empty:
+                return None
+            report['Student Name'] = report['Student Name'].fillna('Unknown')
+            return self.coerce_types('attendance', report)
+
+        attendance_data = self.attendance_rows(class_id, date)
     
         if attendance_data.empty:
             return None
@@ -306,16 +1617,13 @@ class School:
     # Create a copy to avoid SettingWithCopyWarning
         enhanced_report = attendance_data.copy()
     
-    # Add student names to the report
-        student_names = {}
-        for _, row in self.students.iterrows():
-            student_names[row['student_id']] = row['name']
-    
-    # Create a new column with student names
-    # Ensure we're using the correct column name for student ID in attendance data
-        enhanced_report['Student Name'] = enhanced_report['StudentID'].map(
-            lambda sid: student_names.get(sid, 'Unknown')
-    )
+    # Add student names through the student_id index, so the cost follows the size of the register
+    # rather than the number of students
+        labels = [self.lookup('students', sid) for sid in enhanced_report['StudentID']]
+        names = self.students['name']
+        enhanced_report['Student Name'] = [
+            'Unknown' if label is None else names.at[label] for label in labels
+        ]
     
     # Reorder columns for better readability
         columns_order = ['AttendanceID', 'ClassID', 'StudentID', 'Student Name', 'Date', 'Status']
@@ -324,50 +1632,359 @@ class School:
     
         return enhanced_report
     
-    def import_students_csv(self, file_path):
+    def import_students_csv(self, file_path, chunksize=10000, progress=None, key=None):
         """
-        Import student records from a CSV file and append them to the existing students DataFrame.
+        Import student records from a CSV file and append them to the students table.
         The CSV must contain at least the following columns: 'name', 'age', 'class'.
         Optionally, a 'marks' column can also be included.
+        The file is read `chunksize` rows at a time; each chunk is checked against the students schema, its valid
+        rows get a block of new student_ids and are appended straight away, so memory use beyond the table itself
+        is bounded by the chunk size. progress(rows_read, imported, rejected) is called after every chunk.
+        With `key` (a column or list of columns, e.g. ['name', 'age', 'class'] or 'student_id'), rows are matched
+        to existing students with equal key values instead: matches are updated in place (blank cells keep the
+        current value), only unmatched rows are inserted, and a repeated key later in the file updates the earlier
+        row. New rows keep the student_id from the file when it is part of the key.
+        Returns {'imported': rows inserted, 'inserted', 'updated', 'unchanged',
+                 'rejected': [{'row': line in the file, 'reason': ...}], 'total': rows read}.
         """
         try:
-            df_import = pd.read_csv(file_path)
+            header = pd.read_csv(file_path, nrows=0).columns
         except Exception as e:
             raise ValueError(f"Error reading CSV file: {e}")
 
+        key = [key] if isinstance(key, str) else list(key or [])
+        for col in key:
+            if col not in self.table_columns['students']:
+                raise ValueError(f"Unknown key column: {col}")
         # Ensure required columns exist
-        required_cols = ['name', 'age', 'class']
+        required_cols = ['name', 'age', 'class'] + [col for col in key if col not in ['name', 'age', 'class']]
         for col in required_cols:
-            if col not in df_import.columns:
+            if col not in header:
                 raise ValueError(f"Missing required column: {col}")
+        columns = [col for col in ['student_id', 'name', 'age', 'class', 'marks']
+                   if col in header and (col != 'student_id' or col in key)]
 
-        # Determine the starting student_id based on existing records
-        next_id = 1 if self.students.empty else int(self.students['student_id'].max()) + 1
-        new_records = []
-
-        # Iterate over each row in the imported DataFrame
-        for _, row in df_import.iterrows():
-            student_record = {
-                'student_id': next_id,
-                'name': row['name'],
-                'age': row['age'],
-                'class': row['class'],
-                # Use the 'marks' column if available; otherwise, set as None
-                'marks': row['marks'] if 'marks' in df_import.columns else None
-            }
-            new_records.append(student_record)
-            next_id += 1
+        summary = {'imported': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'rejected': [], 'total': 0}
+        # Hash table of the existing students: key values -> student_id, built once and extended with new rows
+        matches = self.student_keys(key) if key else None
+        try:
+            chunks = pd.read_csv(file_path, usecols=columns, dtype={'name': str}, chunksize=chunksize)
+            for chunk in chunks:
+                # Line of each row in the file (the header is line 1)
+                lines = np.arange(summary['total'], summary['total'] + len(chunk)) + 2
+                summary['total'] += len(chunk)
 
-        # Append the new records and save the data
-        new_students_df = pd.DataFrame(new_records)
-        self.students = pd.concat([self.students, new_students_df], ignore_index=True)
-        self.save_data()
-        return new_records
-    
-    def analysis_report(self, class_id):
-        # Create reports directory if it doesn't exist
-        os.makedirs('reports', exist_ok=True)
-        
+                reasons = self.import_rejects('students', chunk)
+                rejected = (reasons != '').to_numpy()
+                summary['rejected'].extend(
+                    {'row': int(line), 'reason': reason} for line, reason in zip(lines[rejected], reasons[rejected])
+                )
+
+                valid = chunk[~rejected].copy()
+                valid['name'] = valid['name'].str.strip()
+                if key:
+                    valid = self.coerce_types('students', valid)
+                    # A key repeated within the chunk is applied in file order, as if each repeat came in a later
+                    # chunk, so the counts do not depend on chunksize: every repeat updates the row before it
+                    repeats = valid.groupby(key, sort=False, dropna=False).cumcount().to_numpy()
+                    for repeat in range(int(repeats.max()) + 1 if len(valid) else 0):
+                        rows = self._upsert_students(valid[repeats == repeat], key, matches, summary)
+                        self._insert_students(rows, key, matches, summary)
+                else:
+                    self._insert_students(valid, key, matches, summary)
+                if progress:
+                    progress(summary['total'], summary['imported'], len(summary['rejected']))
+        except Exception as e:
+            raise ValueError(f"Error reading CSV file after row {summary['total'] + 1}: {e}")
+        finally:
+            # Rows imported before a failure are kept
+            self.save_data()
+        summary['inserted'] = summary['imported']
+        return summary
+
+    @staticmethod
+    def key_values(frame, key):
+        """Key of every row of a frame, as scalars for one column and tuples for several."""
+        if len(key) == 1:
+            return frame[key[0]].tolist()
+        return list(zip(*(frame[col].tolist() for col in key)))
+
+    def student_keys(self, key):
+        """Dict of key values -> student_id over the students table (the first student wins a repeated key)."""
+        students = self.students.dropna(subset=key)
+        students = students.iloc[::-1]
+        return dict(zip(self.key_values(students, key), students['student_id'].tolist()))
+
+    def _insert_students(self, valid, key, matches, summary):
+        """Append validated import rows to the students table, adding their keys to `matches` when upserting."""
+        if valid.empty:
+            return
+        if 'student_id' in valid.columns:
+            ids = valid['student_id'].to_numpy()
+        else:
+            # Reserve a block of student_ids for the rows
+            first_id = self.next_id('students', len(valid))
+            ids = np.arange(first_id, first_id + len(valid))
+        rows = pd.DataFrame({
+            'student_id': ids,
+            'name': valid['name'].values,
+            'age': valid['age'].values,
+            'class': valid['class'].values,
+            # Use the 'marks' column if available; otherwise, leave it empty
+            'marks': valid['marks'].values if 'marks' in valid.columns else np.nan
+        })
+        self.append_rows('students', rows)
+        if key:
+            matches.update(zip(self.key_values(rows, key), rows['student_id']))
+            if 'student_id' in key:
+                # IDs came from the file, so the next free ID is worked out again from the table
+                self._next_ids.pop('students', None)
+        summary['imported'] += len(rows)
+
+    def _upsert_students(self, rows, key, matches, summary):
+        """
+        Update the students matched by `key` through `matches` in place and count them in the summary.
+        `rows` are coerced and hold each key at most once. Returns the rows that did not match anyone, to be inserted.
+        """
+        ids = pd.Series([matches.get(value) for value in self.key_values(rows, key)], index=rows.index, dtype=object)
+        matched = ids.notna()
+        updates = rows[matched]
+        if updates.empty:
+            return rows
+
+        labels_by_id = self._index('students', 'student_id')
+        labels = [labels_by_id[student_id] for student_id in ids[matched]]
+        columns = [col for col in rows.columns if col not in key and col != 'student_id']
+        current = self.students.loc[labels, columns].set_axis(updates.index)
+        incoming = updates[columns]
+        # Blank cells leave the current value alone
+        same = (incoming.isna() | (current == incoming).fillna(False)).all(axis=1).to_numpy()
+        changed = ~same
+        summary['unchanged'] += int(same.sum())
+        summary['updated'] += int(changed.sum())
+        if changed.any():
+            changed_labels = np.array(labels)[changed]
+            for col in columns:
+                values = incoming.loc[changed, col]
+                filled = values.notna().to_numpy()
+                if filled.any():
+                    self.students.loc[changed_labels[filled], col] = values[filled].to_numpy()
+            self.mark_rows_dirty('students', ids[matched][changed].tolist())
+        return rows[~matched]
+
+    def import_attendance_csv(self, paths, workers=None):
+        """
+        Import attendance from one or more register files (e.g. card reader dumps) with ClassID, StudentID, Date
+        and Status columns. Files are parsed in parallel on `workers` threads; dates may carry a time of day and
+        statuses any case. A record for a (ClassID, StudentID, Date) that already exists updates that record's
+        status instead of adding a second one (the last file listed wins when files overlap). New records get a
+        block of AttendanceIDs and the table is saved once, in a single batch.
+        Returns {'inserted', 'updated', 'unchanged', 'total': rows read,
+                 'rejected': [{'file', 'row': line in the file, 'reason'}]}.
+        """
+        paths = [paths] if isinstance(paths, (str, os.PathLike)) else list(paths)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            registers = list(pool.map(self.read_attendance_register, paths))
+
+        keys = ['ClassID', 'StudentID', 'Date']
+        summary = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'total': 0, 'rejected': []}
+        for frame, rejected, total in registers:
+            summary['rejected'].extend(rejected)
+            summary['total'] += total
+        if not registers:
+            return summary
+        incoming = pd.concat([frame for frame, _, _ in registers], ignore_index=True)
+        # One record per student, class and date: the last one read wins
+        incoming = incoming[~incoming.duplicated(keys, keep='last')]
+        if incoming.empty:
+            return summary
+
+        with self.batch():
+            # Match the incoming records to existing ones (the first record of duplicated keys)
+            existing = self.attendance[keys].reset_index()
+            existing = existing[~existing.duplicated(keys)]
+            merged = incoming.merge(existing, on=keys, how='left')
+            matched = merged['index'].notna().to_numpy()
+
+            labels = merged.loc[matched, 'index'].astype('int64').to_numpy()
+            statuses = merged.loc[matched, 'Status'].to_numpy()
+            changed = self.attendance.loc[labels, 'Status'].astype(str).to_numpy() != statuses
+            labels, statuses = labels[changed], statuses[changed]
+            summary['updated'] = len(labels)
+            summary['unchanged'] = int(matched.sum()) - len(labels)
+            if len(labels):
+                counts = self._current_attendance_counts(self.attendance)
+                if counts is not None:
+                    self._count_attendance(counts, self.attendance.loc[labels], -1)
+                self.attendance.loc[labels, 'Status'] = statuses
+                if counts is not None:
+                    self._count_attendance(counts, self.attendance.loc[labels], 1)
+                self.mark_rows_dirty('attendance', self.attendance.loc[labels, 'AttendanceID'].tolist())
+
+            new = merged.loc[~matched, keys + ['Status']]
+            if not new.empty:
+                first_id = self.next_id('attendance', len(new))
+                new.insert(0, 'AttendanceID', np.arange(first_id, first_id + len(new)))
+                self.append_rows('attendance', new.reset_index(drop=True))
+            summary['inserted'] = len(new)
+        return summary
+
+    def read_attendance_register(self, path):
+        """
+        Parse one attendance register file for import_attendance_csv(): dates are cut to the day and statuses
+        lower-cased, then rows are checked against the attendance schema.
+        Returns (valid rows, rejected rows, number of rows read).
+        """
+        try:
+            # IDs are parsed as numbers straight away; a column with bad values stays text for validation to report
+            frame = pd.read_csv(path, skipinitialspace=True)
+        except Exception as e:
+            raise ValueError(f"Error reading CSV file {path}: {e}")
+        frame.columns = frame.columns.str.strip()
+        for col in ['ClassID', 'StudentID', 'Date', 'Status']:
+            if col not in frame.columns:
+                raise ValueError(f"Missing required column in {path}: {col}")
+        frame = frame[['ClassID', 'StudentID', 'Date', 'Status']]
+
+        # Registers repeat a handful of dates and statuses, so each distinct value is normalised once.
+        # Card readers write timestamps; only the day is kept
+        dates = pd.Series(frame['Date'].dropna().unique(), dtype=object)
+        days = dates.astype(str).str.strip().str.replace(r'^(\d{4}-\d{1,2}-\d{1,2})[T ].*$', r'\1', regex=True)
+        statuses = pd.Series(frame['Status'].dropna().unique(), dtype=object)
+        frame = frame.assign(Date=frame['Date'].map(dict(zip(dates, days))),
+                             Status=frame['Status'].map(dict(zip(statuses, statuses.astype(str).str.strip().str.lower()))))
+        reasons = self.import_rejects('attendance', frame)
+        bad = (reasons != '').to_numpy()
+        # Line of each row in the file (the header is line 1)
+        rejected = [{'file': path, 'row': int(label) + 2, 'reason': reason} for label, reason in reasons[bad].items()]
+        valid = self.coerce_types('attendance', frame[~bad].copy())
+        return valid, rejected, len(frame)
+
+    def import_rejects(self, table, frame):
+        """
+        Check imported rows against a table's schema (columns the file leaves out are not required).
+        Returns the reasons each row is rejected, joined with '; ' ('' for valid rows).
+        """
+        return row_errors(self.validator.validate(table, frame, partial=True), frame.index)
+
+    def validate(self, table=None):
+        """
+        Check the rows of a table in memory against its schema and return the report of
+        SchemaValidator.validate() (row label, column, value, error). Without a table, returns table -> report.
+        """
+        if table is None:
+            return {table: self.validate(table) for table in self.table_files}
+        if table not in self.table_files:
+            raise ValueError(f"Unknown table: {table}")
+        return self.validator.validate(table, getattr(self, table))
+
+    def set_grade_scale(self, scale):
+        """
+        Set the letter grades as (low, high, grade) ranges in ascending order; a mark gets the grade whose
+        range has low <= mark < high. The ranges must follow on from each other without gaps.
+        """
+        scale = list(scale)
+        if not scale:
+            raise ValueError("Grade scale must have at least one grade")
+        for (_, high, _), (low, _, grade) in zip(scale, scale[1:]):
+            if low != high:
+                raise ValueError(f"Grade {grade} must start at {high}, where the previous grade stops")
+        bins = [scale[0][0]] + [high for _, high, _ in scale]
+        if any(a >= b for a, b in zip(bins, bins[1:])):
+            raise ValueError("Each grade range must stop above where it starts")
+        self.grade_scale = scale
+        self._grade_bins = bins
+        self._grade_labels = [grade for _, _, grade in scale]
+        # Cached analysis reports were graded on the old scale
+        self.clear_report_cache()
+
+    def grade_marks(self, marks):
+        """Letter grade of each mark as an ordered categorical (NaN for missing marks or marks outside the scale)."""
+        marks = pd.to_numeric(pd.Series(marks), errors='coerce')
+        return pd.cut(marks, bins=self._grade_bins, labels=self._grade_labels, right=False, ordered=True)
+
+    def grade_distribution(self, class_id=None):
+        """
+        Number of students with each grade. For one class this is a Series indexed by grade; with no class_id
+        the whole school is graded at once and the result is a DataFrame with a row per class.
+        Every grade of the scale is included, with zero counts where no student has it.
+        """
+        students = self.students
+        if class_id is not None:
+            students = students[students['class'] == class_id]
+            return self.grade_marks(students['marks']).value_counts(sort=False).rename_axis('grade')
+        grades = pd.DataFrame({'class': students['class'], 'grade': self.grade_marks(students['marks'])})
+        return grades.groupby(['class', 'grade'], observed=False).size().unstack(fill_value=0)
+
+    @staticmethod
+    def present_flags(statuses):
+        """1 for each 'present' status and 0 otherwise, looked up from the categorical codes of the statuses."""
+        statuses = statuses.astype('category')
+        # Code -1 (missing status) picks the trailing 0
+        lookup = np.append(statuses.cat.categories == 'present', False).astype(int)
+        return pd.Series(lookup[statuses.cat.codes.to_numpy()], index=statuses.index)
+
+    def analysis_report(self, class_id, plots=True):
+        """
+        Attendance and marks statistics of a class, with plots saved under reports/; cached until the schedules,
+        attendance or students change (or a plot file is removed).
+        With plots=False only the statistics are computed and report['plots'] is empty; render the plots later
+        with analysis_plot().
+        """
+        if not plots:
+            return self.cached_analysis_stats(class_id)[0]
+        return self.cached_report('analysis', class_id, ANALYSIS_TABLES,
+                                  lambda: self.build_analysis_report(class_id),
+                                  valid=lambda report: all(os.path.exists(path) for path in report['plots'].values()))
+
+    def analysis_image(self, class_id, name):
+        """
+        Render one plot of a class's analysis report ('attendance', 'marks' or 'summary') in memory and return it
+        as PNG bytes, or None if the class has no data for it. Nothing is written to disk. Safe to call from a
+        background thread; cached like the reports.
+        """
+        def build():
+            report, series = self.cached_analysis_stats(class_id)
+            if 'error' in report:
+                raise ValueError(report['error'])
+            return render_analysis_images(report, series, names=[name], cache=self.render_cache).get(name)
+
+        return self.cached_report(f'{name} image', class_id, ANALYSIS_TABLES, build)
+
+    def analysis_plot(self, class_id, name, out_dir='reports'):
+        """Export one plot of a class's analysis report as <out_dir>/class_<id>_<name>.png and return its path."""
+        data = self.analysis_image(class_id, name)
+        if data is None:
+            return None
+        path = analysis_plot_path(class_id, name, out_dir)
+        save_png(data, path)
+        return path
+
+    def export_analysis_plots(self, class_id, out_dir='reports'):
+        """Write every plot of a class's analysis report to disk; returns name -> path."""
+        report = self.cached_analysis_stats(class_id)[0]
+        if 'error' in report:
+            raise ValueError(report['error'])
+        return {name: self.analysis_plot(class_id, name, out_dir) for name in plot_names(report)}
+
+    def cached_analysis_stats(self, class_id):
+        """analysis_stats() through the report cache."""
+        return self.cached_report('analysis stats', class_id, ANALYSIS_TABLES, lambda: self.analysis_stats(class_id))
+
+    def build_analysis_report(self, class_id):
+        report = self.cached_analysis_stats(class_id)[0]
+        if 'error' not in report:
+            try:
+                report['plots'] = self.export_analysis_plots(class_id)
+            except Exception as e:
+                report['error'] = str(e)
+        return report
+
+    def analysis_stats(self, class_id):
+        """
+        Attendance and marks statistics of a class without drawing anything. Returns the report dict (with no
+        plots yet) and the series the plots are drawn from, for plots.render_analysis_plots().
+        """
         report = {
             'class_id': class_id,
             'attendance': {
@@ -382,61 +1999,30 @@ class School:
             },
             'plots': {}
         }
+        series = {}
         
         try:
             # Get class name
-            class_info = self.schedules[self.schedules['classID'] == class_id]
+            class_info = self.select('schedules', {'classID': class_id})
             if not class_info.empty:
                 report['class_name'] = class_info.iloc[0]['ClassName']
             else:
                 report['class_name'] = f"Class {class_id}"
             
-            # Analyze attendance
-            attendance_data = self.attendance[self.attendance['ClassID'] == class_id]
-            if not attendance_data.empty:
-                # Convert status to numeric (1 for present, 0 for absent)
-                attendance_data.loc[:, 'numeric_status'] = attendance_data['Status'].apply(
-                    lambda x: 1 if x.lower() == 'present' else 0
-                )
+            # Analyze attendance from the running counts
+            attendance = self.attendance_stats(class_id)
+            if attendance['total']:
+                report['attendance']['count'] = attendance['total']
+                report['attendance']['present_rate'] = attendance['present_rate']
+                report['attendance']['std_dev'] = attendance['std_dev']
                 
-                report['attendance']['count'] = len(attendance_data)
-                report['attendance']['present_rate'] = attendance_data['numeric_status'].mean() * 100
-                report['attendance']['std_dev'] = attendance_data['numeric_status'].std() * 100
-                
-                # Plot attendance data
-                plt.figure(figsize=(10, 6))
-                
-                # Attendance over time
-                if 'Date' in attendance_data.columns:
-                    # Group by date and calculate attendance rate
-                    attendance_by_date = attendance_data.groupby('Date')['numeric_status'].mean() * 100
-                    
-                    plt.subplot(1, 2, 1)
-                    attendance_by_date.plot(kind='line', marker='o')
-                    plt.title('Attendance Rate Over Time')
-                    plt.xlabel('Date')
-                    plt.ylabel('Attendance Rate (%)')
-                    plt.grid(True)
-                    
-                    # Attendance distribution
-                    plt.subplot(1, 2, 2)
-                    labels = ['Present', 'Absent']
-                    counts = [
-                        (attendance_data['Status'].str.lower() == 'present').sum(),
-                        (attendance_data['Status'].str.lower() == 'absent').sum()
-                    ]
-                    plt.pie(counts, labels=labels, autopct='%1.1f%%', colors=['#4CAF50', '#F44336'])
-                    plt.title('Attendance Distribution')
-                
-                plt.tight_layout()
-                attendance_plot_path = f'reports/class_{class_id}_attendance.png'
-                plt.savefig(attendance_plot_path)
-                plt.close()
-                report['plots']['attendance'] = attendance_plot_path
+                # Attendance rate by date, and present/absent counts
+                series['attendance_by_date'] = self.attendance_by_date(class_id)
+                series['status_counts'] = [attendance['present'], attendance['total'] - attendance['present']]
             
             # Analyze student marks
             # Get students in this class
-            class_students = self.students[self.students['class'] == class_id]
+            class_students = self.select('students', {'class': class_id})
             if not class_students.empty:
                 # Filter out rows where marks is NaN or None
                 marks_data = class_students['marks'].dropna()
@@ -449,92 +2035,142 @@ class School:
                     report['marks']['average'] = marks_data.mean()
                     report['marks']['std_dev'] = marks_data.std()
                     
-                    # Plot marks distribution
-                    plt.figure(figsize=(10, 6))
-                    
-                    # Histogram of marks
-                    plt.subplot(1, 2, 1)
-                    plt.hist(marks_data, bins=10, color='#2196F3', edgecolor='black')
-                    plt.axvline(marks_data.mean(), color='red', linestyle='dashed', linewidth=2, 
-                            label=f'Mean: {marks_data.mean():.2f}')
-                    plt.title('Distribution of Student Marks')
-                    plt.xlabel('Marks')
-                    plt.ylabel('Number of Students')
-                    plt.legend()
-                    plt.grid(True)
-                    
-                    # Grade distribution
-                    plt.subplot(1, 2, 2)
-                    # Define grade ranges
-                    grade_ranges = [
-                        (0, 40, 'F'),
-                        (40, 50, 'D'),
-                        (50, 60, 'C'),
-                        (60, 70, 'B'),
-                        (70, 80, 'B+'),
-                        (80, 90, 'A'),
-                        (90, 101, 'A+')
-                    ]
-                    
-                    grades = []
-                    for mark in marks_data:
-                        for low, high, grade in grade_ranges:
-                            if low <= mark < high:
-                                grades.append(grade)
-                                break
-                    
-                    grade_counts = {}
-                    for grade in set(grades):
-                        grade_counts[grade] = grades.count(grade)
-                    
-                    # Sort grades in proper order
-                    sorted_grades = []
-                    sorted_counts = []
-                    for _, _, grade in grade_ranges:
-                        if grade in grade_counts:
-                            sorted_grades.append(grade)
-                            sorted_counts.append(grade_counts[grade])
-                    
-                    plt.bar(sorted_grades, sorted_counts, color='#FF9800')
-                    plt.title('Grade Distribution')
-                    plt.xlabel('Grade')
-                    plt.ylabel('Number of Students')
-                    plt.grid(True, axis='y')
-                    
-                    plt.tight_layout()
-                    marks_plot_path = f'reports/class_{class_id}_marks.png'
-                    plt.savefig(marks_plot_path)
-                    plt.close()
-                    report['plots']['marks'] = marks_plot_path
-                    
-                    # Create a summary plot
-                    plt.figure(figsize=(12, 8))
-                    plt.suptitle(f"Analysis Report for {report['class_name']} (ID: {class_id})", fontsize=16)
-                    
-                    # Add text summary
-                    summary_text = (
-                        f"Attendance Statistics:\n"
-                        f"  - Total Records: {report['attendance']['count']}\n"
-                        f"  - Present Rate: {report['attendance']['present_rate']:.2f}%\n"
-                        f"  - Standard Deviation: {report['attendance']['std_dev']:.2f}%\n\n"
-                        f"Marks Statistics:\n"
-                        f"  - Total Students: {report['marks']['count']}\n"
-                        f"  - Average Mark: {report['marks']['average']:.2f}\n"
-                        f"  - Standard Deviation: {report['marks']['std_dev']:.2f}"
-                    )
-                    
-                    plt.figtext(0.1, 0.5, summary_text, fontsize=12, 
-                            bbox=dict(facecolor='#E3F2FD', alpha=0.5))
-                    
-                    summary_plot_path = f'reports/class_{class_id}_summary.png'
-                    plt.savefig(summary_plot_path)
-                    plt.close()
-                    report['plots']['summary'] = summary_plot_path
+                    # Counts come out in the order of the grade scale
+                    series['marks'] = marks_data
+                    series['grade_counts'] = self.grade_marks(marks_data).value_counts(sort=False)
         
         except Exception as e:
             report['error'] = str(e)
         # This is for #Jostrix
-        return report
+        return report, series
+
+    def school_overview(self):
+        """
+        Statistics of every class side by side, as a DataFrame with one row per class: class name, attendance
+        records, present rate and standard deviation (%), students, marks count, mean and standard deviation, and
+        one column per grade with the number of students who have it. Attendance comes from the running counts and
+        the students table is grouped once; cached like the reports.
+        """
+        return self.cached_report('overview', None, ANALYSIS_TABLES, self.build_school_overview)
+
+    def overview_image(self):
+        """The class comparison chart of school_overview() as PNG bytes rendered in memory; cached like the reports."""
+        return self.cached_report('overview image', None, ANALYSIS_TABLES,
+                                  lambda: render_overview_image(self.school_overview(), self.render_cache))
+
+    def overview_plot(self, out_dir='reports'):
+        """Export the class comparison chart as <out_dir>/school_overview.png and return its path."""
+        path = f"{out_dir}/school_overview.png"
+        save_png(self.overview_image(), path)
+        return path
+
+    def build_school_overview(self):
+        # Attendance per class from the running counts
+        classes = self.attendance_counts()[1]
+        attendance = pd.DataFrame(
+            [[class_id, total, present] for class_id, (present, total) in classes.items()],
+            columns=['class_id', 'attendance_count', 'present']
+        ).set_index('class_id')
+        attendance['present_rate'] = attendance['present'] / attendance['attendance_count'] * 100
+        rate = attendance['present_rate'] / 100
+        n = attendance['attendance_count']
+        # Sample standard deviation of the 0/1 statuses; undefined for a single record
+        attendance['attendance_std_dev'] = (np.sqrt(rate * (1 - rate) * n / (n - 1)) * 100).where(n > 1)
+
+        # Marks and grades per class in one groupby over the students table
+        students = self.students
+        marks = pd.to_numeric(students['marks'], errors='coerce')
+        grouped = pd.DataFrame({'class': students['class'], 'marks': marks,
+                                'grade': self.grade_marks(marks)}).groupby('class')
+        marks_stats = grouped['marks'].agg(['size', 'count', 'mean', 'std'])
+        marks_stats.columns = ['students', 'marks_count', 'marks_mean', 'marks_std_dev']
+        grades = grouped['grade'].value_counts(sort=False).unstack(fill_value=0)
+        grades = grades.reindex(columns=self._grade_labels, fill_value=0)
+        grades.columns = [f'grade_{grade}' for grade in grades.columns]
+
+        # Class names from the schedule (the first entry of each class)
+        schedules = self.schedules.dropna(subset=['classID']).drop_duplicates('classID')
+        names = pd.Series(schedules['ClassName'].values, index=schedules['classID'].values, name='class_name')
+
+        overview = pd.concat([names, attendance[['attendance_count', 'present_rate', 'attendance_std_dev']],
+                              marks_stats, grades], axis=1)
+        overview.index = overview.index.astype(int)
+        overview = overview.sort_index().rename_axis('class_id').reset_index()
+        counts = ['attendance_count', 'students', 'marks_count'] + list(grades.columns)
+        overview[counts] = overview[counts].fillna(0).astype(int)
+        overview['class_name'] = overview['class_name'].fillna(
+            overview['class_id'].map(lambda class_id: f"Class {class_id}"))
+        return overview
+
+    def report_class_ids(self):
+        """IDs of all scheduled classes, in ascending order."""
+        return sorted(int(class_id) for class_id in self.schedules['classID'].dropna().unique())
+
+    def generate_all_reports(self, class_ids=None, workers=None, progress=None, out_dir='reports'):
+        """
+        Generate the analysis report of many classes (all scheduled classes by default).
+        Statistics are computed here; the plots are rendered in a pool of `workers` processes (one per CPU by
+        default, in this process if workers is 0 or 1) and saved as <out_dir>/class_<id>_*.png. progress(done,
+        total, class_id) is called as each class finishes. A combined <out_dir>/index.csv lists the statistics
+        and plot files of every class. Returns class_id -> report.
+        """
+        class_ids = self.report_class_ids() if class_ids is None else list(class_ids)
+        reports, jobs = {}, {}
+        for class_id in class_ids:
+            reports[class_id], jobs[class_id] = self.cached_analysis_stats(class_id)
+        pending = [class_id for class_id in class_ids if 'error' not in reports[class_id]]
+        done = len(class_ids) - len(pending)
+
+        def finish(class_id, render):
+            nonlocal done
+            try:
+                reports[class_id]['plots'] = render()
+            except Exception as e:
+                reports[class_id]['error'] = str(e)
+            done += 1
+            if progress:
+                progress(done, len(class_ids), class_id)
+
+        if workers is not None and workers <= 1:
+            for class_id in pending:
+                finish(class_id, lambda: render_analysis_plots(reports[class_id], jobs[class_id], out_dir,
+                                                               cache=self.render_cache))
+        elif pending:
+            # Workers are spawned rather than forked: this runs on a background thread of the GUI, and forking a
+            # process with other threads running (e.g. preload()) can deadlock the child
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                     mp_context=multiprocessing.get_context('spawn')) as pool:
+                futures = {pool.submit(render_analysis_plots, reports[class_id], jobs[class_id], out_dir,
+                                       cache=self.render_cache): class_id
+                           for class_id in pending}
+                for future in as_completed(futures):
+                    finish(futures[future], future.result)
+
+        self.write_report_index([reports[class_id] for class_id in class_ids], out_dir)
+        return reports
+
+    def write_report_index(self, reports, out_dir='reports'):
+        """Write <out_dir>/index.csv with one row of statistics and plot paths per report."""
+        rows = []
+        for report in reports:
+            rows.append({
+                'class_id': report['class_id'],
+                'class_name': report.get('class_name'),
+                'attendance_count': report['attendance']['count'],
+                'present_rate': report['attendance']['present_rate'],
+                'attendance_std_dev': report['attendance']['std_dev'],
+                'marks_count': report['marks']['count'],
+                'marks_average': report['marks']['average'],
+                'marks_std_dev': report['marks']['std_dev'],
+                'attendance_plot': report['plots'].get('attendance'),
+                'marks_plot': report['plots'].get('marks'),
+                'summary_plot': report['plots'].get('summary'),
+                'error': report.get('error')
+            })
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, 'index.csv')
+        pd.DataFrame(rows).to_csv(path, index=False)
+        return path
 
         
 
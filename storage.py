@@ -0,0 +1,111 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+
+# sqlite3 only understands plain Python scalars
+for np_type in (np.int64, np.int32, np.int16, np.int8):
+    sqlite3.register_adapter(np_type, int)
+sqlite3.register_adapter(np.bool_, bool)
+# Dates are stored as YYYY-MM-DD text, matching the CSV files
+sqlite3.register_adapter(pd.Timestamp, lambda ts: ts.strftime('%Y-%m-%d'))
+
+# JSON Schema type -> SQLite column type
+SQL_TYPES = {'integer': 'INTEGER', 'number': 'REAL', 'string': 'TEXT', 'boolean': 'INTEGER'}
+
+# Secondary indexes for the lookups the reports run most
+INDEXES = {
+    'attendance': [('ClassID', 'Date')],
+    'schedules': [('classID', 'Date')]
+}
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SQLiteStore:
+    """Embedded SQLite storage for the School tables."""
+
+    def __init__(self, path, columns, primary_keys, schemas=None):
+        self.path = path
+        # table -> list of column names, primary key column and JSON schema
+        self.columns = columns
+        self.primary_keys = primary_keys
+        self.schemas = schemas or {}
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.create_tables()
+
+    def column_type(self, table, column):
+        """Map a column's JSON Schema type to an SQLite type (TEXT when unknown)."""
+        spec = self.schemas.get(table, {}).get('properties', {}).get(column, {})
+        types = spec.get('type', 'string')
+        if isinstance(types, list):
+            types = next((t for t in types if t != 'null'), 'string')
+        return SQL_TYPES.get(types, 'TEXT')
+
+    def create_tables(self):
+        """Create any missing tables and indexes."""
+        with self.conn:
+            for table, columns in self.columns.items():
+                key = self.primary_keys.get(table)
+                defs = []
+                for col in columns:
+                    definition = f"{quote(col)} {self.column_type(table, col)}"
+                    if col == key:
+                        definition += ' PRIMARY KEY'
+                    defs.append(definition)
+                self.conn.execute(f"CREATE TABLE IF NOT EXISTS {quote(table)} ({', '.join(defs)})")
+                for index_cols in INDEXES.get(table, []):
+                    name = f"idx_{table}_{'_'.join(index_cols)}"
+                    cols = ', '.join(quote(c) for c in index_cols)
+                    self.conn.execute(f"CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table)} ({cols})")
+
+    def to_rows(self, table, frame):
+        """Return the table's columns present in the frame and its rows as Python values (NaN -> NULL)."""
+        columns = [col for col in self.columns[table] if col in frame.columns]
+        values = frame[columns].astype(object)
+        values = values.where(frame[columns].notna(), None)
+        return columns, values.values.tolist()
+
+    def read_table(self, table):
+        return pd.read_sql_query(f"SELECT * FROM {quote(table)}", self.conn)
+
+    def query(self, sql, params=()):
+        """Run a SELECT and return the result as a DataFrame."""
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def query_chunks(self, sql, params=(), chunksize=50000):
+        """Run a SELECT and yield the result as DataFrames of at most `chunksize` rows."""
+        return pd.read_sql_query(sql, self.conn, params=params, chunksize=chunksize)
+
+    def insert_rows(self, table, frame, replace=False):
+        """Insert rows in a single transaction; with replace=True existing primary keys are overwritten."""
+        if frame.empty:
+            return
+        columns, rows = self.to_rows(table, frame)
+        verb = 'INSERT OR REPLACE' if replace else 'INSERT'
+        placeholders = ', '.join('?' for _ in columns)
+        sql = f"{verb} INTO {quote(table)} ({', '.join(quote(c) for c in columns)}) VALUES ({placeholders})"
+        with self.conn:
+            self.conn.executemany(sql, rows)
+
+    def delete_rows(self, table, keys):
+        """Delete rows by primary key in a single transaction."""
+        key = self.primary_keys[table]
+        with self.conn:
+            self.conn.executemany(f"DELETE FROM {quote(table)} WHERE {quote(key)} = ?",
+                                  [(k,) for k in keys])
+
+    def replace_table(self, table, frame):
+        """Replace the whole contents of a table in one transaction."""
+        columns, rows = self.to_rows(table, frame)
+        with self.conn:
+            self.conn.execute(f"DELETE FROM {quote(table)}")
+            if rows:
+                placeholders = ', '.join('?' for _ in columns)
+                self.conn.executemany(
+                    f"INSERT INTO {quote(table)} ({', '.join(quote(c) for c in columns)}) VALUES ({placeholders})",
+                    rows)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+
+# Columns of the report returned by SchemaValidator.validate()
+REPORT_COLUMNS = ['row', 'column', 'value', 'error']
+
+
+class ValidationError(ValueError):
+    """Rows rejected by the schema; `errors` holds the report (see SchemaValidator.validate())."""
+
+    def __init__(self, table, errors):
+        self.table = table
+        self.errors = errors
+        first = errors.iloc[0]
+        more = f" (and {len(errors) - 1} more)" if len(errors) > 1 else ''
+        super().__init__(f"Invalid {table} data: {first['error']}{more}")
+
+
+class SchemaValidator:
+    """
+    The JSON Schemas of the School tables compiled into column checks that run on whole DataFrames at once.
+    Each column gets the checks its schema asks for: required (not null unless the type allows null), integer,
+    number, date format and enum. Columns already converted to their School dtype only need the cheap checks
+    (a categorical column is checked once per category, not once per row); raw text from CSV files or forms is
+    parsed the same way School.coerce_types() would parse it.
+    """
+
+    def __init__(self, schemas, dtypes):
+        self.rules = {table: self.compile(schema, dtypes.get(table, {})) for table, schema in schemas.items()}
+        self.strict = {table: schema.get('additionalProperties', True) is False for table, schema in schemas.items()}
+
+    @staticmethod
+    def compile(schema, dtypes):
+        """column -> rule dict for one table's schema."""
+        required = set(schema.get('required', []))
+        rules = {}
+        for column, spec in schema.get('properties', {}).items():
+            types = spec.get('type', 'string')
+            types = types if isinstance(types, list) else [types]
+            enum = spec.get('enum', [])
+            rules[column] = {
+                'dtype': dtypes.get(column, 'object'),
+                'required': column in required and 'null' not in types,
+                'enum': enum,
+                # Enums written in lower case accept any case, like School.coerce_types()
+                'lower': bool(enum) and all(v == v.lower() for v in enum),
+            }
+        return rules
+
+    def validate(self, table, frame, partial=False):
+        """
+        Check every row of a frame against a table's schema. Returns a DataFrame with one row per problem:
+        the row label, the column, the offending value and the error (empty when everything is valid). Columns the
+        schema does not know are reported once with row None. With partial=True, required columns the frame does
+        not have are not reported (for imports that leave out generated columns).
+        """
+        rules = self.rules.get(table)
+        if rules is None:
+            raise ValueError(f"Unknown table: {table}")
+        found = []
+        if self.strict[table]:
+            for column in frame.columns:
+                if column not in rules:
+                    found.append(pd.DataFrame({'row': [None], 'column': [column], 'value': [None],
+                                               'error': [f"{column} is not a column of {table}"]}))
+        for column, rule in rules.items():
+            if column not in frame.columns:
+                if rule['required'] and not partial and len(frame):
+                    found.append(self.report(frame, column, np.ones(len(frame), dtype=bool), f"{column} is required"))
+                continue
+            for mask, error in self.column_errors(column, rule, frame[column]):
+                if mask.any():
+                    found.append(self.report(frame, column, mask, error))
+        if not found:
+            return pd.DataFrame(columns=REPORT_COLUMNS)
+        return pd.concat(found, ignore_index=True)
+
+    def check_value(self, table, column, value):
+        """Check one value for a table column, raising ValidationError if it does not fit."""
+        errors = self.validate(table, pd.DataFrame({column: pd.Series([value], dtype=object)}), partial=True)
+        if not errors.empty:
+            raise ValidationError(table, errors)
+
+    @staticmethod
+    def report(frame, column, mask, error):
+        values = frame[column] if column in frame.columns else pd.Series(None, index=frame.index, dtype=object)
+        return pd.DataFrame({'row': frame.index[mask], 'column': column,
+                             'value': values[mask].astype(object).values, 'error': error})
+
+    def column_errors(self, column, rule, values):
+        """(row mask, error) pairs for one column, as boolean numpy arrays."""
+        if values.dtype == object:
+            # Raw input repeats a few distinct values (dates, statuses, class IDs), so each is parsed only once
+            codes, uniques = pd.factorize(values)
+            uniques = pd.Series(list(uniques) + [None], dtype=object)
+            codes = np.where(codes < 0, len(uniques) - 1, codes)
+            # Blank text counts as missing
+            text = uniques.where(uniques.isna(), uniques.astype(str).str.strip())
+            for mask, error in self.value_errors(column, rule, text.where(text != '')):
+                yield mask[codes], error
+            return
+        yield from self.value_errors(column, rule, values)
+
+    def value_errors(self, column, rule, values):
+        dtype = rule['dtype']
+        missing = values.isna().to_numpy()
+        if rule['required']:
+            yield missing, f"{column} is required"
+        present = ~missing
+
+        if dtype in ('Int32', 'float64'):
+            if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+                numbers = values
+            else:
+                numbers = pd.to_numeric(values, errors='coerce')
+                yield present & numbers.isna().to_numpy(), f"{column} must be a number"
+            if dtype == 'Int32' and not pd.api.types.is_integer_dtype(numbers.dtype):
+                fraction = (numbers % 1).to_numpy(dtype=float, na_value=0)
+                yield fraction != 0, f"{column} must be a whole number"
+        elif dtype == 'datetime64[ns]':
+            if not pd.api.types.is_datetime64_any_dtype(values.dtype):
+                dates = pd.to_datetime(values, format='%Y-%m-%d', errors='coerce')
+                yield present & dates.isna().to_numpy(), f"{column} must be a date in YYYY-MM-DD format"
+
+        if rule['enum']:
+            allowed = set(rule['enum'])
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # Check each category once, then flag the rows that use a bad one
+                bad = [code for code, value in enumerate(values.cat.categories)
+                       if (str(value).lower() if rule['lower'] else value) not in allowed]
+                mask = np.isin(values.cat.codes.to_numpy(), bad) if bad else np.zeros(len(values), dtype=bool)
+            else:
+                text = values.astype(str)
+                if rule['lower']:
+                    text = text.str.lower()
+                mask = present & ~text.isin(allowed).to_numpy()
+            yield mask, f"{column} must be one of {rule['enum']}"
+
+
+def row_errors(errors, index):
+    """The errors of a validation report joined per row ('' for rows without any), aligned to `index`."""
+    reasons = pd.Series('', index=index)
+    errors = errors[errors['row'].notna()]
+    if not errors.empty:
+        joined = errors.groupby('row', sort=False)['error'].agg('; '.join)
+        reasons.loc[joined.index] = joined.values
+    return reasons